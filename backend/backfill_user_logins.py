@@ -0,0 +1,35 @@
+from database.db import SessionLocal
+from models.catalog import User
+from utils.user_logins import add_logins
+
+BATCH_SIZE = 1000
+
+
+def backfill_user_logins():
+    # users registered before user_logins existed, and emails a name held
+    # before migration 0006 split the two; safe to re-run
+    db = SessionLocal()
+    added = 0
+    last_id = 0
+    try:
+        while True:
+            users = db.query(User)\
+                .filter(User.id > last_id)\
+                .order_by(User.id)\
+                .limit(BATCH_SIZE)\
+                .all()
+            if not users:
+                break
+            last_id = users[-1].id
+
+            added += add_logins(db, users)
+            db.commit()
+            db.expunge_all()
+            print(f"… up to user {last_id}: {added} identifiers added")
+    finally:
+        db.close()
+    print(f"✅ user_logins: {added} identifiers added")
+
+
+if __name__ == "__main__":
+    backfill_user_logins()
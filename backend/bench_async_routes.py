@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+
+# a pool large enough for the concurrency below, so neither path is
+# capped by connections rather than by how it waits
+os.environ.setdefault("DB_POOL_SIZE", "200")
+os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database.db import get_db, get_async_db
+from models.catalog import Product
+
+# Throughput of a sync route (threadpool worker + pymysql) against its
+# async twin (event loop + aiomysql), in process over httpx. Each request
+# waits BENCH_LATENCY_MS, a stand-in for MySQL round trips on a real
+# network (the session's connection is only checked out at the query),
+# then runs the same SELECT against DATABASE_URL (migrated schema
+# expected). Set it to 0 against a remote MySQL to measure that alone.
+#   python bench_async_routes.py
+LATENCY = float(os.getenv("BENCH_LATENCY_MS", "50")) / 1000
+N_REQUESTS = int(os.getenv("BENCH_REQUESTS", "3000"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "200"))
+
+app = FastAPI()
+
+
+@app.get("/sync")
+def sync_route(db: Session = Depends(get_db)):
+    # ❌ holds one of AnyIO's threadpool workers for the whole wait
+    time.sleep(LATENCY)
+    return len(db.execute(select(Product.id).limit(20)).all())
+
+
+@app.get("/async")
+async def async_route(db: AsyncSession = Depends(get_async_db)):
+    # ✅ the loop serves other requests while this one waits
+    await asyncio.sleep(LATENCY)
+    return len((await db.execute(select(Product.id).limit(20))).all())
+
+
+async def throughput(path):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        slots = asyncio.Semaphore(CONCURRENCY)
+
+        async def one():
+            async with slots:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        # warm the pools before timing
+        await asyncio.gather(*(one() for _ in range(CONCURRENCY)))
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(N_REQUESTS)))
+        return N_REQUESTS / (time.perf_counter() - start)
+
+
+def bench_async_routes():
+    print(f"📦 {N_REQUESTS} requests, {CONCURRENCY} concurrent, "
+          f"{LATENCY * 1000:g}ms simulated latency")
+    sync_rps = asyncio.run(throughput("/sync"))
+    async_rps = asyncio.run(throughput("/async"))
+    print(f"   sync route   {sync_rps:7.0f} req/s")
+    print(f"   async route  {async_rps:7.0f} req/s  ({async_rps / sync_rps:.2f}x)")
+
+
+if __name__ == "__main__":
+    bench_async_routes()
@@ -0,0 +1,90 @@
+import os
+import re
+import sys
+
+# list products from the database rather than the in-process snapshot, so
+# the keyset paging queries are exercised too
+os.environ.setdefault("CATALOG_CACHE_MAX_PRODUCTS", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database.db import engine, async_engine
+from main import app
+from utils.security import create_access_token
+
+# Hot read paths: every SELECT they send is EXPLAINed against DATABASE_URL
+# and full table scans are reported. Run it against a database with
+# realistic row counts; on near-empty tables MySQL may prefer a scan.
+#   python check_query_plans.py      (exit code 1 when a scan is found)
+HOT_PATHS = [
+    ("GET", "/catalog/categories", None),
+    ("GET", "/catalog/categories/1/sub", None),
+    ("GET", "/catalog/products", None),
+    ("GET", "/catalog/products?sort=price_asc&min_price=1&max_price=100000", None),
+    ("GET", "/catalog/products?sort=name&main_category_id=1", None),
+    ("GET", "/catalog/products?sort=price_desc&discounted=true", None),
+    ("GET", "/catalog/products?sort=discount", None),
+    ("GET", "/catalog/products/sub/1", None),
+    ("GET", "/catalog/products/sub/1?cursor=WyJuZXdlc3QiLDFd", None),
+    ("GET", "/catalog/products/type-images?ids=1&ids=2", None),
+    ("GET", "/cases/main-categories", None),
+    ("GET", "/cases/phones/by-main/1", None),
+    ("GET", "/cases/models/by-phone/1", None),
+    ("GET", "/cases/tree", None),
+    ("GET", "/cases/products", None),
+    ("GET", "/cases/product/1", None),
+    ("GET", "/cases/product/1/variants", None),
+    ("GET", "/cases/product/1/allowed-models", None),
+    ("POST", "/auth/login", {"email": "nobody@example.com", "password": "x"}),
+    ("GET", "/cart", None),
+]
+
+# signed-in requests (the cart) run as user 1
+AUTH = {"Authorization": "Bearer " + create_access_token({"sub": "1"})}
+
+captured = {}
+
+
+def record(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        captured.setdefault(statement, parameters)
+
+
+def full_scans(conn, statement, parameters):
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        # "SCAN products" = table scan; "SCAN .. USING INDEX" walks an index
+        return [r[-1] for r in rows if re.fullmatch(r"SCAN \S+", r[-1])]
+    if dialect == "mysql":
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+        return [f"{r['table']}: type=ALL" for r in rows if r["type"] == "ALL"]
+    raise SystemExit(f"EXPLAIN check not implemented for {dialect}")
+
+
+def check_query_plans():
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", record)
+
+    with TestClient(app, headers=AUTH) as client:
+        for method, path, body in HOT_PATHS:
+            client.request(method, path, json=body)
+
+    flagged = 0
+    with engine.connect() as conn:
+        for statement, parameters in captured.items():
+            scans = full_scans(conn, statement, parameters)
+            if not scans:
+                continue
+            flagged += 1
+            print("❌ full scan:", " ".join(statement.split())[:300])
+            for scan in scans:
+                print("     ", scan)
+
+    print(f"{'❌' if flagged else '✅'} {len(captured)} queries checked, {flagged} with full scans")
+    return flagged
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_query_plans() else 0)
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Connect latency and checkout wait counters for one engine's pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.connect_ms_total = 0.0
+        self.connect_ms_max = 0.0
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.timeouts = 0
+
+    def record_connect(self, ms: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_ms_total += ms
+            self.connect_ms_max = max(self.connect_ms_max, ms)
+
+    def record_wait(self, ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "connect_ms_avg": round(self.connect_ms_total / self.connects, 3) if self.connects else 0.0,
+                "connect_ms_max": round(self.connect_ms_max, 3),
+                "checkouts": self.checkouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+class _TimedGet:
+    # time spent getting a connection out of the pool: queueing behind
+    # other requests when it is exhausted, plus connecting when it grows
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_wait((time.perf_counter() - started) * 1000)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedGet, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine, stats: PoolStats):
+    pool = engine.pool
+    if isinstance(pool, _TimedGet):
+        pool.stats = stats
+
+    @event.listens_for(engine, "do_connect")
+    def timed_connect(dialect, conn_rec, cargs, cparams):
+        started = time.perf_counter()
+        conn = dialect.connect(*cargs, **cparams)
+        stats.record_connect((time.perf_counter() - started) * 1000)
+        return conn
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    # SQLite's default pools do not track size/overflow
+    for key, attr in [
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ]:
+        fn = getattr(pool, attr, None)
+        status[key] = fn() if fn else None
+    status.update(engine.pool_stats.snapshot())
+    return status
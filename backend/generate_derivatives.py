@@ -0,0 +1,49 @@
+from database.db import SessionLocal
+from models.catalog import ProductImage, CaseVariant
+from utils.derivatives import get_pool, render_derivatives, is_current
+
+BATCH_SIZE = 100
+
+
+def backfill(db, model):
+    # rows uploaded before the derivative pipeline existed, and rows whose
+    # renditions use the old <sha>.thumb.* naming (shared between
+    # <sha>.jpg and <sha>.png); the old files are left in place
+    done = failed = 0
+    last_id = 0
+    while True:
+        batch = db.query(model)\
+            .filter(model.id > last_id)\
+            .order_by(model.id)\
+            .limit(BATCH_SIZE)\
+            .all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        rows = [r for r in batch if r.image and not is_current(r.image, r.derivatives)]
+
+        futures = [get_pool().submit(render_derivatives, r.image) for r in rows]
+        for row, future in zip(rows, futures):
+            try:
+                row.derivatives = future.result()
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"❌ {model.__tablename__} {row.id}: {e}")
+        db.commit()
+    return done, failed
+
+
+def generate_derivatives():
+    db = SessionLocal()
+    try:
+        for model in (ProductImage, CaseVariant):
+            done, failed = backfill(db, model)
+            print(f"✅ {model.__tablename__}: {done} rendered, {failed} failed")
+    finally:
+        db.close()
+        get_pool().shutdown()
+
+
+if __name__ == "__main__":
+    generate_derivatives()
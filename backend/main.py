@@ -1,16 +1,14 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from database.db import engine
-from database.base import Base
 from routers.admin_catalog import router as admin_catalog_router
 from routers.user_catalog import router as user_catalog_router
 from routers.admin_auth import router as admin_auth_router  
 from routers.user_auth import router as user_auth_router
+from utils.static_files import CachedStaticFiles
 
-# Create all database tables
-Base.metadata.create_all(bind=engine)
+# Tables are not created here: the schema is versioned under migrations/
+# and applied as a separate step (`alembic upgrade head`)
 
 app = FastAPI()
 
@@ -31,7 +29,8 @@ app.add_middleware(
 # =========================
 # STATIC FILES
 # =========================
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# ✅ uploads get immutable caching; .br/.gz siblings served when accepted
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # =========================
 # ROUTERS
@@ -42,7 +41,9 @@ app.include_router(admin_catalog_router)
 app.include_router(user_catalog_router)
 app.include_router(admin_auth_router)
 app.include_router(user_auth_router)
-from routers import admin_cases, cases_public
+from routers import admin_cases, cases_public, admin_diagnostics, cart
 
 app.include_router(admin_cases.router)
 app.include_router(cases_public.router)
+app.include_router(admin_diagnostics.router)
+app.include_router(cart.router)
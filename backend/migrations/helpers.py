@@ -0,0 +1,48 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Databases created by the old create_all-on-startup already have some of
+# what the early revisions add; these make those steps no-ops there, so
+# one `alembic upgrade head` works on fresh and existing databases alike.
+
+
+def has_table(table):
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def has_column(table, column):
+    return any(
+        c["name"] == column
+        for c in sa.inspect(op.get_bind()).get_columns(table)
+    )
+
+
+def has_index(table, name):
+    return any(
+        i["name"] == name
+        for i in sa.inspect(op.get_bind()).get_indexes(table)
+    )
+
+
+def create_table(name, *columns, **kw):
+    if not has_table(name):
+        op.create_table(name, *columns, **kw)
+
+
+def add_column(table, column):
+    # -> True when the column was added (and may need a backfill)
+    if has_column(table, column.name):
+        return False
+    with op.batch_alter_table(table) as batch:
+        batch.add_column(column)
+    return True
+
+
+def create_index(name, table, columns, unique=False):
+    if not has_index(table, name):
+        op.create_index(name, table, columns, unique=unique)
+
+
+def drop_index(name, table):
+    if has_index(table, name):
+        op.drop_index(name, table_name=table)
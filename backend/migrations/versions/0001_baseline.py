@@ -0,0 +1,140 @@
+"""baseline: the schema create_all used to build on startup
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_table, create_index
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_table(
+        "main_categories",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100)),
+        sa.Column("image", sa.String(255)),
+        sa.Column("is_active", sa.Boolean),
+    )
+    create_table(
+        "sub_categories",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100)),
+        sa.Column("image", sa.String(255)),
+        sa.Column("is_active", sa.Boolean),
+        sa.Column("main_category_id", sa.Integer, sa.ForeignKey("main_categories.id")),
+    )
+    create_table(
+        "products",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100)),
+        sa.Column("subtitle", sa.String(200)),
+        sa.Column("price", sa.Integer),
+        sa.Column("discount_percent", sa.Integer),
+        sa.Column("is_available", sa.Boolean),
+        sa.Column("sub_category_id", sa.Integer, sa.ForeignKey("sub_categories.id")),
+    )
+    create_table(
+        "product_images",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("type_name", sa.String(10)),
+        sa.Column("image", sa.String(255)),
+        sa.Column("product_id", sa.Integer, sa.ForeignKey("products.id")),
+    )
+    create_table(
+        "admins",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("username", sa.String(50), unique=True),
+        sa.Column("password", sa.String(255)),
+    )
+    create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100)),
+        sa.Column("email", sa.String(100), unique=True),
+        sa.Column("password", sa.String(255)),
+    )
+    create_table(
+        "cart",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("product_id", sa.Integer, sa.ForeignKey("products.id")),
+        sa.Column("quantity", sa.Integer),
+    )
+
+    create_table(
+        "case_main_category",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("is_active", sa.Integer),
+    )
+    create_table(
+        "case_phone",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(120), nullable=False),
+        sa.Column(
+            "case_main_category_id", sa.Integer,
+            sa.ForeignKey("case_main_category.id"), nullable=False
+        ),
+        sa.Column("is_active", sa.Integer),
+    )
+    create_table(
+        "case_model",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(120), nullable=False),
+        sa.Column("case_phone_id", sa.Integer, sa.ForeignKey("case_phone.id"), nullable=False),
+        sa.Column("is_active", sa.Integer),
+    )
+    create_table(
+        "case_product",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("title", sa.String(120), nullable=False),
+        sa.Column("subtitle", sa.Text),
+        sa.Column("price", sa.Integer, nullable=False),
+        sa.Column("discount_percent", sa.Integer),
+        sa.Column("is_active", sa.Integer),
+    )
+    create_table(
+        "case_variant",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("case_product_id", sa.Integer, sa.ForeignKey("case_product.id"), nullable=False),
+        sa.Column("type_name", sa.String(30), nullable=False),
+        sa.Column("image", sa.String(255), nullable=False),
+        sa.Column("is_active", sa.Integer),
+    )
+    create_table(
+        "case_product_model_map",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("case_product_id", sa.Integer, sa.ForeignKey("case_product.id"), nullable=False),
+        sa.Column(
+            "case_main_category_id", sa.Integer,
+            sa.ForeignKey("case_main_category.id"), nullable=False
+        ),
+        sa.Column("case_phone_id", sa.Integer, sa.ForeignKey("case_phone.id"), nullable=False),
+        sa.Column("case_model_id", sa.Integer, sa.ForeignKey("case_model.id"), nullable=False),
+        sa.Column("is_active", sa.Integer),
+    )
+
+    # index=True on the case tables' ids
+    for table in (
+        "case_main_category", "case_phone", "case_model",
+        "case_product", "case_variant", "case_product_model_map",
+    ):
+        create_index(f"ix_{table}_id", table, ["id"])
+
+
+def downgrade():
+    for table in (
+        "case_product_model_map", "case_variant", "case_product",
+        "case_model", "case_phone", "case_main_category",
+        "cart", "users", "admins",
+        "product_images", "products", "sub_categories", "main_categories",
+    ):
+        op.drop_table(table)
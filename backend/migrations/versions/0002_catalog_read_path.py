@@ -0,0 +1,86 @@
+"""columns, tables and indexes of the catalog read-path work
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_table, add_column, create_index, drop_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_sub_categories_visible_main", "sub_categories", ["is_visible", "main_category_id"]),
+    ("ix_products_visible_id", "products", ["is_visible", "id"]),
+    ("ix_products_visible_price_id", "products", ["is_visible", "price", "id"]),
+    ("ix_products_visible_name_id", "products", ["is_visible", "name", "id"]),
+    ("ix_products_visible_sub_id", "products", ["is_visible", "sub_category_id", "id"]),
+    ("ix_product_images_product_type", "product_images", ["product_id", "type_name"]),
+    ("ix_case_map_product_active", "case_product_model_map", ["case_product_id", "is_active"]),
+    ("ix_case_map_model_active", "case_product_model_map", ["case_model_id", "is_active"]),
+]
+
+
+def upgrade():
+    # denormalized visibility (utils/visibility)
+    added = [
+        add_column("sub_categories", sa.Column("is_visible", sa.Boolean, server_default=sa.text("1"))),
+        add_column("products", sa.Column("is_visible", sa.Boolean, server_default=sa.text("1"))),
+    ]
+    if any(added):
+        # same rules as utils.visibility.sync_all
+        op.execute(
+            "UPDATE sub_categories SET is_visible = CASE WHEN is_active = 1 AND "
+            "(SELECT m.is_active FROM main_categories m "
+            "WHERE m.id = sub_categories.main_category_id) = 1 THEN 1 ELSE 0 END"
+        )
+        op.execute(
+            "UPDATE products SET is_visible = CASE WHEN is_available = 1 AND "
+            "(SELECT s.is_visible FROM sub_categories s "
+            "WHERE s.id = products.sub_category_id) = 1 THEN 1 ELSE 0 END"
+        )
+
+    # image renditions (utils/derivatives); backfill: generate_derivatives.py
+    add_column("product_images", sa.Column("derivatives", sa.JSON, nullable=True))
+    add_column("case_variant", sa.Column("derivatives", sa.JSON, nullable=True))
+
+    # refcounted upload files (utils/media_store)
+    create_table(
+        "media_blobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("path", sa.String(255), nullable=False, unique=True),
+        sa.Column("size", sa.Integer, nullable=False),
+        sa.Column("ref_count", sa.Integer, nullable=False),
+    )
+
+    # login identifiers (utils/user_logins); backfill: backfill_user_logins.py
+    create_table(
+        "user_logins",
+        sa.Column("identifier", sa.String(100), primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+    )
+    create_index("ix_user_logins_user_id", "user_logins", ["user_id"])
+
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index(name, table)
+
+    op.drop_table("user_logins")
+    op.drop_table("media_blobs")
+    for table, column in (
+        ("case_variant", "derivatives"),
+        ("product_images", "derivatives"),
+        ("products", "is_visible"),
+        ("sub_categories", "is_visible"),
+    ):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column)
@@ -0,0 +1,41 @@
+"""foreign-key and public filter indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index, drop_index
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# product_images.product_id is already the leading column of
+# ix_product_images_product_type (0002), so it needs no index of its own.
+# On MySQL these replace the implicit indexes InnoDB made for the FKs.
+INDEXES = [
+    ("ix_sub_categories_main", "sub_categories", ["main_category_id"]),
+    ("ix_products_sub", "products", ["sub_category_id"]),
+    ("ix_cart_user", "cart", ["user_id"]),
+    ("ix_cart_product", "cart", ["product_id"]),
+    ("ix_case_phone_main_active", "case_phone", ["case_main_category_id", "is_active"]),
+    ("ix_case_model_phone_active", "case_model", ["case_phone_id", "is_active"]),
+    ("ix_case_variant_product_active", "case_variant", ["case_product_id", "is_active"]),
+    # public filters: active rows in id order
+    ("ix_main_categories_active_id", "main_categories", ["is_active", "id"]),
+    ("ix_case_main_category_active_id", "case_main_category", ["is_active", "id"]),
+    ("ix_case_phone_active_id", "case_phone", ["is_active", "id"]),
+    ("ix_case_model_active_id", "case_model", ["is_active", "id"]),
+    ("ix_case_product_active_id", "case_product", ["is_active", "id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index(name, table)
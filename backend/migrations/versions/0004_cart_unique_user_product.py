@@ -0,0 +1,52 @@
+"""one cart row per user and product
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index, drop_index
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicates():
+    # the old read-modify-write add could race into several rows for the
+    # same product: keep the oldest one with the summed quantity
+    bind = op.get_bind()
+    groups = bind.execute(sa.text(
+        "SELECT user_id, product_id, MIN(id), SUM(COALESCE(quantity, 1)) "
+        "FROM cart WHERE user_id IS NOT NULL AND product_id IS NOT NULL "
+        "GROUP BY user_id, product_id HAVING COUNT(*) > 1"
+    )).all()
+
+    for user_id, product_id, keep_id, total in groups:
+        params = {"user_id": user_id, "product_id": product_id, "keep_id": keep_id}
+        bind.execute(
+            sa.text("UPDATE cart SET quantity = :total WHERE id = :keep_id"),
+            {**params, "total": total}
+        )
+        bind.execute(
+            sa.text(
+                "DELETE FROM cart WHERE user_id = :user_id "
+                "AND product_id = :product_id AND id <> :keep_id"
+            ),
+            params
+        )
+
+
+def upgrade():
+    merge_duplicates()
+    create_index("uq_cart_user_product", "cart", ["user_id", "product_id"], unique=True)
+    # covered by the leading column of the unique index
+    drop_index("ix_cart_user", "cart")
+
+
+def downgrade():
+    create_index("ix_cart_user", "cart", ["user_id"])
+    drop_index("uq_cart_user_product", "cart")
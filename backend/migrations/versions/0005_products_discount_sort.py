@@ -0,0 +1,23 @@
+"""keyset index for the discount sort
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from migrations.helpers import create_index, drop_index
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    create_index(
+        "ix_products_visible_discount_id", "products",
+        ["is_visible", "discount_percent", "id"]
+    )
+
+
+def downgrade():
+    drop_index("ix_products_visible_discount_id", "products")
@@ -0,0 +1,82 @@
+"""key user_logins on (kind, identifier)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Emails and names shared one identifier namespace, so a name such as
+# "carol@x.com" could take Carol's email key. The table is derived data:
+# it is rebuilt with a kind column, existing rows copied over (a row is an
+# email when it matches its user's normalized email).
+
+
+def login_key(value):
+    return (value or "").strip().casefold()
+
+
+def create_user_logins(*key):
+    op.create_table(
+        "user_logins",
+        *key,
+        sa.Column("identifier", sa.String(100), nullable=False),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_user_logins_user_id", "user_logins", ["user_id"])
+
+
+def upgrade():
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT l.identifier, l.user_id, u.email FROM user_logins l "
+        "JOIN users u ON u.id = l.user_id"
+    )).all()
+
+    op.drop_table("user_logins")
+    create_user_logins(
+        sa.Column("kind", sa.String(5), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "identifier"),
+    )
+
+    table = sa.table(
+        "user_logins",
+        sa.column("kind"), sa.column("identifier"), sa.column("user_id"),
+    )
+    logins = [
+        {
+            "kind": "email" if identifier == login_key(email) else "name",
+            "identifier": identifier,
+            "user_id": user_id,
+        }
+        for identifier, user_id, email in rows
+    ]
+    if logins:
+        op.bulk_insert(table, logins)
+
+
+def downgrade():
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT identifier, user_id FROM user_logins ORDER BY kind"
+    )).all()
+
+    op.drop_table("user_logins")
+    create_user_logins(sa.PrimaryKeyConstraint("identifier"))
+
+    # "email" sorts first: an email keeps an identifier a name shares
+    seen = {}
+    for identifier, user_id in rows:
+        seen.setdefault(identifier, user_id)
+    table = sa.table("user_logins", sa.column("identifier"), sa.column("user_id"))
+    if seen:
+        op.bulk_insert(table, [
+            {"identifier": identifier, "user_id": user_id}
+            for identifier, user_id in seen.items()
+        ])
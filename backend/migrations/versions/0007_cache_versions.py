@@ -0,0 +1,33 @@
+"""shared cache invalidation counters
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_table
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # utils/catalog_snapshot: bumped by invalidate(), polled by each worker
+    create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("version", sa.Integer, nullable=False),
+    )
+    seeded = op.get_bind().execute(
+        sa.text("SELECT 1 FROM cache_versions WHERE name = 'catalog'")
+    ).first()
+    if not seeded:
+        op.execute("INSERT INTO cache_versions (name, version) VALUES ('catalog', 0)")
+
+
+def downgrade():
+    op.drop_table("cache_versions")
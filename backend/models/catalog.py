@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index, JSON
 from database.base import Base
 from sqlalchemy.orm import relationship
 from sqlalchemy import Text
@@ -11,6 +11,11 @@ class MainCategory(Base):
     image = Column(String(255))
     is_active = Column(Boolean, default=True)
 
+    # active main categories in id order (catalog snapshot)
+    __table_args__ = (
+        Index("ix_main_categories_active_id", "is_active", "id"),
+    )
+
 
 class SubCategory(Base):
     __tablename__ = "sub_categories"
@@ -22,6 +27,14 @@ class SubCategory(Base):
 
     main_category_id = Column(Integer, ForeignKey("main_categories.id"))
 
+    # is_active AND parent main category active; kept by utils/visibility
+    is_visible = Column(Boolean, default=True)
+
+    __table_args__ = (
+        Index("ix_sub_categories_visible_main", "is_visible", "main_category_id"),
+        Index("ix_sub_categories_main", "main_category_id"),
+    )
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -34,6 +47,20 @@ class Product(Base):
 
     sub_category_id = Column(Integer, ForeignKey("sub_categories.id"))
 
+    # is_available AND parent sub category visible; kept by utils/visibility
+    is_visible = Column(Boolean, default=True)
+
+    # keyset paging indexes for the public listing sorts (see user_catalog)
+    __table_args__ = (
+        Index("ix_products_visible_id", "is_visible", "id"),
+        Index("ix_products_visible_price_id", "is_visible", "price", "id"),
+        Index("ix_products_visible_name_id", "is_visible", "name", "id"),
+        Index("ix_products_visible_discount_id", "is_visible", "discount_percent", "id"),
+        Index("ix_products_visible_sub_id", "is_visible", "sub_category_id", "id"),
+        # admin listing per sub category and the cascade deletes
+        Index("ix_products_sub", "sub_category_id"),
+    )
+
 
 class ProductImage(Base):
     __tablename__ = "product_images"
@@ -41,9 +68,40 @@ class ProductImage(Base):
     id = Column(Integer, primary_key=True)
     type_name = Column(String(10))  # type1..type5
     image = Column(String(255))
+    # {"thumb": {"webp": path, "jpeg": path}, "medium": {...}}; see utils/derivatives
+    derivatives = Column(JSON, nullable=True)
 
     product_id = Column(Integer, ForeignKey("products.id"))
 
+    # backs the cover-image (type1) join in the public product listings
+    __table_args__ = (
+        Index("ix_product_images_product_type", "product_id", "type_name"),
+    )
+
+
+class MediaBlob(Base):
+    """
+    ✅ One stored upload file (content-addressed: sha256 in the name)
+    ref_count = image columns currently pointing at path
+    """
+    __tablename__ = "media_blobs"
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String(255), nullable=False, unique=True)
+    size = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+
+class CacheVersion(Base):
+    """
+    ✅ Shared invalidation counter per in-process cache (e.g. "catalog")
+    bumped on writes, polled by every worker process
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 
 class Admin(Base):
     __tablename__ = "admins"
@@ -63,6 +121,19 @@ class User(Base):
     password = Column(String(255))  # hashed
 
 
+class UserLogin(Base):
+    """
+    ✅ Login identifier -> user: normalized email and username
+    (kind, identifier) is the primary key, so a login is one index probe
+    and a name never occupies an email's key
+    """
+    __tablename__ = "user_logins"
+
+    kind = Column(String(5), primary_key=True)  # "email" | "name"
+    identifier = Column(String(100), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+
 
 class Cart(Base):
     __tablename__ = "cart"
@@ -72,6 +143,13 @@ class Cart(Base):
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer, default=1)
 
+    # one row per product in a user's cart: adds upsert on this key
+    # (it also serves the user_id foreign key and the per-user lookups)
+    __table_args__ = (
+        Index("uq_cart_user_product", "user_id", "product_id", unique=True),
+        Index("ix_cart_product", "product_id"),
+    )
+
 class CaseMainCategory(Base):
     __tablename__ = "case_main_category"
 
@@ -81,6 +159,10 @@ class CaseMainCategory(Base):
 
     phones = relationship("CasePhone", back_populates="main_category", cascade="all, delete")
 
+    __table_args__ = (
+        Index("ix_case_main_category_active_id", "is_active", "id"),
+    )
+
 
 class CasePhone(Base):
     __tablename__ = "case_phone"
@@ -93,6 +175,13 @@ class CasePhone(Base):
     main_category = relationship("CaseMainCategory", back_populates="phones")
     models = relationship("CaseModel", back_populates="phone", cascade="all, delete")
 
+    # children of a main category, optionally only the active ones;
+    # all active phones in id order (catalog snapshot)
+    __table_args__ = (
+        Index("ix_case_phone_main_active", "case_main_category_id", "is_active"),
+        Index("ix_case_phone_active_id", "is_active", "id"),
+    )
+
 
 class CaseModel(Base):
     __tablename__ = "case_model"
@@ -104,6 +193,11 @@ class CaseModel(Base):
 
     phone = relationship("CasePhone", back_populates="models")
 
+    __table_args__ = (
+        Index("ix_case_model_phone_active", "case_phone_id", "is_active"),
+        Index("ix_case_model_active_id", "is_active", "id"),
+    )
+
 
 class CaseProduct(Base):
     __tablename__ = "case_product"
@@ -117,6 +211,11 @@ class CaseProduct(Base):
 
     variants = relationship("CaseVariant", back_populates="case_product", cascade="all, delete")
 
+    # public case listing: active rows, newest first
+    __table_args__ = (
+        Index("ix_case_product_active_id", "is_active", "id"),
+    )
+
 
 class CaseVariant(Base):
     __tablename__ = "case_variant"
@@ -125,10 +224,15 @@ class CaseVariant(Base):
     case_product_id = Column(Integer, ForeignKey("case_product.id"), nullable=False)
     type_name = Column(String(30), nullable=False)  # type1..type5
     image = Column(String(255), nullable=False)
+    derivatives = Column(JSON, nullable=True)  # same shape as ProductImage
     is_active = Column(Integer, default=1)
 
     case_product = relationship("CaseProduct", back_populates="variants")
 
+    __table_args__ = (
+        Index("ix_case_variant_product_active", "case_product_id", "is_active"),
+    )
+
 
 class CaseProductModelMap(Base):
     """
@@ -144,4 +248,10 @@ class CaseProductModelMap(Base):
     case_phone_id = Column(Integer, ForeignKey("case_phone.id"), nullable=False)
     case_model_id = Column(Integer, ForeignKey("case_model.id"), nullable=False)
 
-    is_active = Column(Integer, default=1)  # ✅ visibility per model mapping
\ No newline at end of file
+    is_active = Column(Integer, default=1)  # ✅ visibility per model mapping
+
+    # allowed-models lookup per case product, and reverse lookup per model
+    __table_args__ = (
+        Index("ix_case_map_product_active", "case_product_id", "is_active"),
+        Index("ix_case_map_model_active", "case_model_id", "is_active"),
+    )
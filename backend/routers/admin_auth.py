@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from database.db import get_db
+from database.db import get_async_db
 from models.catalog import Admin
-from utils.security import verify_password, create_access_token
+from utils.security import create_access_token, password_hasher
 
 router = APIRouter(prefix="/admin/auth", tags=["Admin Auth"])
 
@@ -14,17 +15,26 @@ class LoginRequest(BaseModel):
 
 
 @router.post("/login")
-def admin_login(
+async def admin_login(
     data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    admin = db.query(Admin)\
-        .filter(Admin.username == data.username)\
-        .first()
+    admin = await db.scalar(
+        select(Admin).where(Admin.username == data.username).limit(1)
+    )
 
-    if not admin or not verify_password(data.password, admin.password):
+    if not admin:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # bcrypt is CPU-bound: verified in the shared worker-process pool
+    ok, new_hash = await password_hasher.verify_and_update(data.password, admin.password)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    if new_hash:
+        admin.password = new_hash
+        await db.commit()
+
     token = create_access_token({"sub": admin.username})
 
     return {
@@ -1,6 +1,14 @@
+from typing import Literal
 from fastapi import APIRouter, Depends, Form, UploadFile, File, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.db import get_db
+from database.db import get_db, get_async_db
+from utils.catalog_snapshot import catalog_cache, case_tree_for
+from utils.search_index import search_index
+from utils.uploads import save_image
+from utils.media_store import acquire, release
+from utils.derivatives import make_derivatives
 from models.catalog import (
     CaseMainCategory,
     CasePhone,
@@ -9,30 +17,16 @@ from models.catalog import (
     CaseVariant,
     CaseProductModelMap,
 )
-import os, shutil, uuid
+from schemas.catalog import BulkToggle
+import os
 
 router = APIRouter(prefix="/admin/cases", tags=["Admin Cases"])
 
 UPLOAD_DIR = "static/cases"
+MAX_BATCH_IDS = 500
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-# =========================
-# UTILITY
-# =========================
-def save_image(image: UploadFile):
-    filename = f"{uuid.uuid4()}_{image.filename}"
-    path = os.path.join(UPLOAD_DIR, filename)
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-    return path
-
-
-def delete_file(path: str):
-    if path and os.path.exists(path):
-        os.remove(path)
-
-
 # =========================
 # CASE MAIN CATEGORY
 # =========================
@@ -45,6 +39,7 @@ def add_case_main_category(
     db.add(cat)
     db.commit()
     db.refresh(cat)
+    catalog_cache.invalidate()
     return {"id": cat.id}
 
 
@@ -53,6 +48,12 @@ def list_case_main_categories(db: Session = Depends(get_db)):
     return db.query(CaseMainCategory).order_by(CaseMainCategory.id.desc()).all()
 
 
+@router.get("/tree")
+def case_tree(db: Session = Depends(get_db)):
+    # ✅ full hierarchy incl. inactive nodes (is_active on every level)
+    return case_tree_for(db, active_only=False)
+
+
 @router.put("/main-category/{id}")
 def update_case_main_category(
     id: int,
@@ -65,6 +66,7 @@ def update_case_main_category(
 
     cat.name = name
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -80,6 +82,7 @@ def toggle_case_main_category(
 
     cat.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -91,6 +94,7 @@ def delete_case_main_category(id: int, db: Session = Depends(get_db)):
 
     db.delete(cat)
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Deleted"}
 
 
@@ -111,6 +115,7 @@ def add_case_phone(
     db.add(p)
     db.commit()
     db.refresh(p)
+    catalog_cache.invalidate()
     return {"id": p.id}
 
 
@@ -133,6 +138,7 @@ def update_case_phone(
 
     phone.name = name
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -148,6 +154,7 @@ def toggle_case_phone(
 
     phone.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -159,6 +166,7 @@ def delete_case_phone(id: int, db: Session = Depends(get_db)):
 
     db.delete(phone)
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Deleted"}
 
 
@@ -175,6 +183,7 @@ def add_case_model(
     db.add(m)
     db.commit()
     db.refresh(m)
+    catalog_cache.invalidate()
     return {"id": m.id}
 
 
@@ -197,6 +206,7 @@ def update_case_model(
 
     m.name = name
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -212,6 +222,7 @@ def toggle_case_model(
 
     m.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
 
 
@@ -223,6 +234,7 @@ def delete_case_model(id: int, db: Session = Depends(get_db)):
 
     db.delete(m)
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Deleted"}
 
 
@@ -247,6 +259,8 @@ def add_case_product(
     db.add(p)
     db.commit()
     db.refresh(p)
+    catalog_cache.invalidate()
+    search_index.index_cases(db, CaseProduct.id == p.id)
     return {"id": p.id}
 
 
@@ -273,6 +287,8 @@ def update_case_product(
     p.price = price
     p.discount_percent = discount_percent
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_cases(db, CaseProduct.id == id)
     return {"message": "Updated"}
 
 
@@ -288,6 +304,8 @@ def toggle_case_product(
 
     p.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_cases(db, CaseProduct.id == id)
     return {"message": "Updated"}
 
 
@@ -302,16 +320,16 @@ def delete_case_product(id: int, db: Session = Depends(get_db)):
         CaseVariant.case_product_id == id
     ).all()
 
-    for v in variants:
-        delete_file(v.image)
-
     db.query(CaseVariant).filter(CaseVariant.case_product_id == id).delete()
     db.query(CaseProductModelMap).filter(
         CaseProductModelMap.case_product_id == id
     ).delete()
 
     db.delete(p)
+    release(db, *[v.image for v in variants])
     db.commit()
+    catalog_cache.invalidate()
+    search_index.remove("case", [id])
     return {"message": "Deleted"}
 
 
@@ -319,31 +337,40 @@ def delete_case_product(id: int, db: Session = Depends(get_db)):
 # CASE PRODUCT VARIANTS
 # =========================
 @router.post("/case-product/{case_product_id}/variant")
-def upload_case_variant(
+async def upload_case_variant(
     case_product_id: int,
     type_name: str = Form(...),   # type1..type5
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    old = db.query(CaseVariant).filter(
-        CaseVariant.case_product_id == case_product_id,
-        CaseVariant.type_name == type_name
-    ).first()
+    # ✅ file + renditions before the first statement (see upload_type_image)
+    path = await save_image(image, UPLOAD_DIR)
+    derivatives = await make_derivatives(path)
+
+    old = await db.scalar(
+        select(CaseVariant).where(
+            CaseVariant.case_product_id == case_product_id,
+            CaseVariant.type_name == type_name
+        ).limit(1)
+    )
 
     if old:
-        delete_file(old.image)
-        db.delete(old)
-        db.commit()
+        await db.run_sync(release, old.image)
+        await db.delete(old)
+        await db.flush()
 
     v = CaseVariant(
         case_product_id=case_product_id,
         type_name=type_name,
-        image=save_image(image),
+        image=path,
+        derivatives=derivatives,
         is_active=1
     )
     db.add(v)
-    db.commit()
-    db.refresh(v)
+    await db.run_sync(acquire, path)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.run_sync(search_index.index_cases, CaseProduct.id == case_product_id)
     return {"id": v.id, "message": "Uploaded"}
 
 
@@ -377,6 +404,8 @@ def toggle_case_variant(
 
     v.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_cases(db, CaseProduct.id == v.case_product_id)
     return {"message": "Updated"}
 
 
@@ -390,9 +419,11 @@ def delete_case_variant(case_product_id: int, type_name: str, db: Session = Depe
     if not v:
         raise HTTPException(404, "Variant not found")
 
-    delete_file(v.image)
+    release(db, v.image)
     db.delete(v)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_cases(db, CaseProduct.id == case_product_id)
     return {"message": "Deleted"}
 
 
@@ -425,6 +456,7 @@ def map_case_product_to_model(
     db.add(m)
     db.commit()
     db.refresh(m)
+    catalog_cache.invalidate()
     return {"id": m.id, "message": "Mapped"}
 
 
@@ -459,4 +491,49 @@ def toggle_case_product_model_map(
 
     row.is_active = 1 if is_active.lower() == "true" else 0
     db.commit()
+    catalog_cache.invalidate()
     return {"message": "Updated"}
+
+
+# =========================
+# BULK VISIBILITY
+# =========================
+# entity -> (model, case products whose search row changes or None)
+BULK_TOGGLES = {
+    "main-categories": (CaseMainCategory, None),
+    "phones": (CasePhone, None),
+    "models": (CaseModel, None),
+    "case-products": (CaseProduct, lambda ids: CaseProduct.id.in_(ids)),
+    "variants": (
+        CaseVariant,
+        lambda ids: CaseProduct.id.in_(
+            select(CaseVariant.case_product_id).where(CaseVariant.id.in_(ids))
+        )
+    ),
+    "maps": (CaseProductModelMap, None),
+}
+
+
+# 👁️ PUT /bulk-toggle/models  {"ids": [1, 2, ..], "state": false}
+@router.put("/bulk-toggle/{entity}")
+def bulk_toggle_cases(
+    entity: Literal[tuple(BULK_TOGGLES)],
+    data: BulkToggle,
+    db: Session = Depends(get_db)
+):
+    ids = list(set(data.ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(400, f"At most {MAX_BATCH_IDS} ids per request")
+    if not ids:
+        return {"updated": 0}
+
+    # ✅ one UPDATE, one commit, however many ids
+    model, affected = BULK_TOGGLES[entity]
+    updated = db.query(model)\
+        .filter(model.id.in_(ids))\
+        .update({model.is_active: 1 if data.state else 0}, synchronize_session=False)
+    db.commit()
+    catalog_cache.invalidate()
+    if affected:
+        search_index.index_cases(db, affected(ids))
+    return {"updated": updated}
@@ -1,28 +1,75 @@
-from fastapi import APIRouter, Depends, Form, UploadFile, File, HTTPException
+from typing import Literal
+from fastapi import APIRouter, Depends, Form, UploadFile, File, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.db import get_db
-from models.catalog import MainCategory, SubCategory, Product, ProductImage
-import os, shutil, uuid
+from database.db import get_db, get_async_db, SessionLocal
+from utils.catalog_snapshot import catalog_cache, type_images_for
+from utils.search_index import search_index
+from utils.visibility import (
+    sync_main_category,
+    sync_sub_category,
+    sync_product_visibility,
+    set_mains_active,
+    set_subs_active,
+    set_products_available,
+)
+from utils.uploads import save_image
+from utils.media_store import acquire, release
+from utils.derivatives import make_derivatives
+from utils.file_janitor import janitor
+from utils.catalog_import import (
+    parse_manifest,
+    archive_members,
+    validate_rows,
+    store_images,
+    write_import,
+    rejected,
+)
+from utils.catalog_export import EXPORTS, ndjson_stream, csv_stream
+from models.catalog import MainCategory, SubCategory, Product, ProductImage, Cart
+from schemas.catalog import BulkToggle
+import os
+import zipfile
+from fastapi.concurrency import run_in_threadpool
 
 router = APIRouter(prefix="/admin/catalog", tags=["Admin Catalog"])
 
 UPLOAD_DIR = "static/products"
+MAX_BATCH_IDS = 500
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 # =========================
-# UTILITY
+# CASCADE HELPERS
 # =========================
-def save_image(image: UploadFile):
-    filename = f"{uuid.uuid4()}_{image.filename}"
-    path = os.path.join(UPLOAD_DIR, filename)
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-    return path
-
-def delete_file(path: str):
-    if path and os.path.exists(path):
-        os.remove(path)
+def delete_products_where(db: Session, *criteria):
+    # ✅ set-based cascade: one SELECT for ids + image paths, then one
+    # DELETE each for the images, the cart lines holding the products
+    # (cart.product_id references them) and the products, whatever the count
+    rows = db.execute(
+        select(Product.id, ProductImage.image)
+        .outerjoin(ProductImage, ProductImage.product_id == Product.id)
+        .where(*criteria)
+    ).all()
+
+    product_ids = list(dict.fromkeys(product_id for product_id, _ in rows))
+    paths = [image for _, image in rows if image]
+    if not product_ids:
+        return product_ids, paths
+
+    matching = select(Product.id).where(*criteria)
+    db.query(ProductImage)\
+        .filter(ProductImage.product_id.in_(matching))\
+        .delete(synchronize_session=False)
+    db.query(Cart)\
+        .filter(Cart.product_id.in_(matching))\
+        .delete(synchronize_session=False)
+    db.query(Product)\
+        .filter(*criteria)\
+        .delete(synchronize_session=False)
+    return product_ids, paths
 
 
 # =========================
@@ -31,19 +78,21 @@ def delete_file(path: str):
 
 # ➕ ADD
 @router.post("/main-category")
-def add_main_category(
+async def add_main_category(
     name: str = Form(...),
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    path = await save_image(image, UPLOAD_DIR)
     cat = MainCategory(
         name=name,
-        image=save_image(image),
+        image=path,
         is_active=1
     )
     db.add(cat)
-    db.commit()
-    db.refresh(cat)
+    await db.run_sync(acquire, path)
+    await db.commit()
+    catalog_cache.invalidate()
     return {"id": cat.id}
 
 
@@ -65,7 +114,13 @@ def toggle_main_category(
         raise HTTPException(404)
 
     cat.is_active = 1 if is_active.lower() == "true" else 0
+    db.flush()
+    sync_main_category(db, id)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.sub_category_id.in_(
+        select(SubCategory.id).where(SubCategory.main_category_id == id)
+    ))
     return {"message": "Updated"}
 
 @router.delete("/main-category/{id}")
@@ -74,27 +129,28 @@ def delete_main_category(id: int, db: Session = Depends(get_db)):
     if not cat:
         raise HTTPException(404, "Main category not found")
 
-    # ❌ delete image from disk
-    delete_file(cat.image)
+    # ❌ image files: released now, removed from disk after the commit
+    paths = [cat.image]
 
-    # ❌ delete sub categories + their images
-    subs = db.query(SubCategory).filter(SubCategory.main_category_id == id).all()
-    for sub in subs:
-        delete_file(sub.image)
+    # ❌ sub categories -> products -> images, one statement per level
+    subs = select(SubCategory.id).where(SubCategory.main_category_id == id)
+    paths += db.scalars(
+        select(SubCategory.image).where(SubCategory.main_category_id == id)
+    ).all()
 
-        # ❌ delete products under sub category
-        products = db.query(Product).filter(Product.sub_category_id == sub.id).all()
-        for p in products:
-            images = db.query(ProductImage).filter(ProductImage.product_id == p.id).all()
-            for img in images:
-                delete_file(img.image)
-            db.query(ProductImage).filter(ProductImage.product_id == p.id).delete()
-
-        db.query(Product).filter(Product.sub_category_id == sub.id).delete()
+    product_ids, image_paths = delete_products_where(
+        db, Product.sub_category_id.in_(subs)
+    )
+    paths += image_paths
 
-    db.query(SubCategory).filter(SubCategory.main_category_id == id).delete()
+    db.query(SubCategory)\
+        .filter(SubCategory.main_category_id == id)\
+        .delete(synchronize_session=False)
     db.delete(cat)
+    release(db, *paths)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.remove("product", product_ids)
 
     return {"message": "Main category deleted"}
 
@@ -105,21 +161,25 @@ def delete_main_category(id: int, db: Session = Depends(get_db)):
 
 # ➕ ADD
 @router.post("/sub-category")
-def add_sub_category(
+async def add_sub_category(
     name: str = Form(...),
     main_category_id: int = Form(...),
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    path = await save_image(image, UPLOAD_DIR)
     sub = SubCategory(
         name=name,
-        image=save_image(image),
+        image=path,
         main_category_id=main_category_id,
         is_active=1
     )
     db.add(sub)
-    db.commit()
-    db.refresh(sub)
+    await db.run_sync(acquire, path)
+    await db.flush()
+    await db.run_sync(sync_sub_category, sub.id)
+    await db.commit()
+    catalog_cache.invalidate()
     return {"id": sub.id}
 
 
@@ -143,7 +203,11 @@ def toggle_sub_category(
         raise HTTPException(404)
 
     sub.is_active = 1 if is_active.lower() == "true" else 0
+    db.flush()
+    sync_sub_category(db, id)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.sub_category_id == id)
     return {"message": "Updated"}
 @router.delete("/sub-category/{id}")
 def delete_sub_category(id: int, db: Session = Depends(get_db)):
@@ -151,19 +215,14 @@ def delete_sub_category(id: int, db: Session = Depends(get_db)):
     if not sub:
         raise HTTPException(404, "Sub category not found")
 
-    delete_file(sub.image)
-
-    products = db.query(Product).filter(Product.sub_category_id == id).all()
-    for p in products:
-        images = db.query(ProductImage).filter(ProductImage.product_id == p.id).all()
-        for img in images:
-            delete_file(img.image)
-
-        db.query(ProductImage).filter(ProductImage.product_id == p.id).delete()
+    product_ids, paths = delete_products_where(db, Product.sub_category_id == id)
+    paths.append(sub.image)
 
-    db.query(Product).filter(Product.sub_category_id == id).delete()
     db.delete(sub)
+    release(db, *paths)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.remove("product", product_ids)
 
     return {"message": "Sub category deleted"}
 
@@ -191,11 +250,65 @@ def add_product(
         is_available=1
     )
     db.add(product)
+    db.flush()
+    sync_product_visibility(db, Product.id == product.id)
     db.commit()
     db.refresh(product)
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.id == product.id)
     return {"id": product.id}
 
 
+# 📦 BULK IMPORT: manifest (CSV/JSON) + optional zip of type images
+@router.post("/products/import")
+async def import_products(
+    manifest: UploadFile = File(...),
+    images: UploadFile | None = File(None),
+    dry_run: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    rows = parse_manifest(manifest.filename, await manifest.read())
+
+    archive = None
+    if images is not None:
+        try:
+            archive = await run_in_threadpool(zipfile.ZipFile, images.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(400, "Image archive is not a valid zip")
+
+    try:
+        # ✅ everything checked before the first write
+        products, errors = await db.run_sync(validate_rows, rows, archive_members(archive))
+        if errors:
+            raise rejected(errors)
+        if dry_run:
+            return {"valid": len(products)}
+
+        stored, created, errors = await store_images(archive, products, UPLOAD_DIR)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    try:
+        if errors:
+            raise rejected(errors)
+        ids = await db.run_sync(write_import, products, stored)
+        await db.commit()
+    except BaseException:
+        # ❌ all or nothing: no rows, and the new files go back out
+        await db.rollback()
+        janitor.enqueue(created)
+        raise
+
+    catalog_cache.invalidate()
+    await db.run_sync(search_index.index_products, Product.id.in_(ids))
+    return {
+        "created": len(ids),
+        "images": sum(len(p["images"]) for p in products),
+        "ids": ids
+    }
+
+
 # 📄 LIST (ADMIN)
 @router.get("/products/by-sub-category/{sub_id}")
 def admin_products(sub_id: int, db: Session = Depends(get_db)):
@@ -216,7 +329,11 @@ def toggle_product(
         raise HTTPException(404)
 
     product.is_available = 1 if is_available.lower() == "true" else 0
+    db.flush()
+    sync_product_visibility(db, Product.id == id)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.id == id)
     return {"message": "Updated"}
 
 
@@ -225,25 +342,37 @@ def toggle_product(
 # =========================
 
 @router.post("/product/{product_id}/type-image")
-def upload_type_image(
+async def upload_type_image(
     product_id: int,
     type_name: str = Form(...),     # type1..type5
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
+    # ✅ file + renditions first: no DB connection or row lock is held
+    # while the upload streams and the render pool works
+    path = await save_image(image, UPLOAD_DIR)
+    derivatives = await make_derivatives(path)
+
     # delete existing image for this type
-    db.query(ProductImage).filter(
+    same_type = (
         ProductImage.product_id == product_id,
         ProductImage.type_name == type_name
-    ).delete()
+    )
+    old_paths = (await db.scalars(select(ProductImage.image).where(*same_type))).all()
+    await db.execute(delete(ProductImage).where(*same_type))
 
     img = ProductImage(
         product_id=product_id,
         type_name=type_name,
-        image=save_image(image)
+        image=path,
+        derivatives=derivatives
     )
     db.add(img)
-    db.commit()
+    await db.run_sync(acquire, path)
+    await db.run_sync(release, *old_paths)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.run_sync(search_index.index_products, Product.id == product_id)
 
     return {"message": f"{type_name} uploaded"}
 
@@ -257,17 +386,34 @@ def get_type_images(product_id: int, db: Session = Depends(get_db)):
     return {img.type_name: img.image for img in images}
 
 
+# 📦 BATCH: /products/type-images?ids=1&ids=2 -> {id: {type1: path, ..}}
+@router.get("/products/type-images")
+def get_type_images_batch(
+    ids: list[int] = Query(...),
+    db: Session = Depends(get_db)
+):
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(400, f"At most {MAX_BATCH_IDS} ids per request")
+
+    return type_images_for(db, ids, visible_only=False)
+
+
 @router.delete("/product/{product_id}/type-image/{type_name}")
 def delete_type_image(
     product_id: int,
     type_name: str,
     db: Session = Depends(get_db)
 ):
-    db.query(ProductImage).filter(
+    same_type = (
         ProductImage.product_id == product_id,
         ProductImage.type_name == type_name
-    ).delete()
+    )
+    paths = db.scalars(select(ProductImage.image).where(*same_type)).all()
+    db.query(ProductImage).filter(*same_type).delete()
+    release(db, *paths)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.id == product_id)
 
     return {"message": "Image removed"}
 @router.delete("/product/{id}")
@@ -276,44 +422,46 @@ def delete_product(id: int, db: Session = Depends(get_db)):
     if not product:
         raise HTTPException(404, "Product not found")
 
-    images = db.query(ProductImage).filter(ProductImage.product_id == id).all()
-    for img in images:
-        delete_file(img.image)
-
-    db.query(ProductImage).filter(ProductImage.product_id == id).delete()
-    db.delete(product)
+    # images and cart lines go with it
+    _, paths = delete_products_where(db, Product.id == id)
+    release(db, *paths)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.remove("product", [id])
 
     return {"message": "Product deleted"}
 
 @router.put("/main-category/{id}")
-def update_main_category(
+async def update_main_category(
     id: int,
     name: str = Form(...),
     image: UploadFile | None = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    cat = db.get(MainCategory, id)
+    cat = await db.get(MainCategory, id)
     if not cat:
         raise HTTPException(404, "Main category not found")
 
     cat.name = name
 
     if image:
-        delete_file(cat.image)
-        cat.image = save_image(image)
+        old_path = cat.image
+        cat.image = await save_image(image, UPLOAD_DIR)
+        await db.run_sync(acquire, cat.image)
+        await db.run_sync(release, old_path)
 
-    db.commit()
+    await db.commit()
+    catalog_cache.invalidate()
     return {"message": "Main category updated"}
 @router.put("/sub-category/{id}")
-def update_sub_category(
+async def update_sub_category(
     id: int,
     name: str = Form(...),
     main_category_id: int = Form(...),
     image: UploadFile | None = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    sub = db.get(SubCategory, id)
+    sub = await db.get(SubCategory, id)
     if not sub:
         raise HTTPException(404, "Sub category not found")
 
@@ -321,10 +469,17 @@ def update_sub_category(
     sub.main_category_id = main_category_id
 
     if image:
-        delete_file(sub.image)
-        sub.image = save_image(image)
-
-    db.commit()
+        old_path = sub.image
+        sub.image = await save_image(image, UPLOAD_DIR)
+        await db.run_sync(acquire, sub.image)
+        await db.run_sync(release, old_path)
+
+    # re-parenting can change what the sub and its products inherit
+    await db.flush()
+    await db.run_sync(sync_sub_category, id)
+    await db.commit()
+    catalog_cache.invalidate()
+    await db.run_sync(search_index.index_products, Product.sub_category_id == id)
     return {"message": "Sub category updated"}
 @router.put("/product/{id}")
 def update_product(
@@ -346,5 +501,86 @@ def update_product(
     product.discount_percent = discount_percent
     product.sub_category_id = sub_category_id
 
+    db.flush()
+    sync_product_visibility(db, Product.id == id)
     db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, Product.id == id)
     return {"message": "Product updated"}
+
+
+# =========================
+# CATALOG CACHE
+# =========================
+@router.get("/cache-stats")
+def catalog_cache_stats():
+    return catalog_cache.stats()
+
+
+# =========================
+# BULK VISIBILITY
+# =========================
+# entity -> (flag + visibility update, products whose public row changes)
+BULK_TOGGLES = {
+    "main-categories": (
+        set_mains_active,
+        lambda ids: Product.sub_category_id.in_(
+            select(SubCategory.id).where(SubCategory.main_category_id.in_(ids))
+        )
+    ),
+    "sub-categories": (set_subs_active, lambda ids: Product.sub_category_id.in_(ids)),
+    "products": (set_products_available, lambda ids: Product.id.in_(ids)),
+}
+
+
+# 👁️ PUT /bulk-toggle/products  {"ids": [1, 2, ..], "state": false}
+@router.put("/bulk-toggle/{entity}")
+def bulk_toggle(
+    entity: Literal[tuple(BULK_TOGGLES)],
+    data: BulkToggle,
+    db: Session = Depends(get_db)
+):
+    ids = list(set(data.ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(400, f"At most {MAX_BATCH_IDS} ids per request")
+    if not ids:
+        return {"updated": 0}
+
+    # ✅ one UPDATE for the rows (plus the visibility sync below them),
+    # one commit, however many ids
+    set_state, affected = BULK_TOGGLES[entity]
+    updated = set_state(db, ids, data.state)
+    db.commit()
+    catalog_cache.invalidate()
+    search_index.index_products(db, affected(ids))
+    return {"updated": updated}
+
+
+# =========================
+# EXPORT
+# =========================
+# 📤 /export?format=ndjson            -> every entity, one tagged object per line
+# 📤 /export?format=csv&entity=products -> one entity (CSV columns differ)
+@router.get("/export")
+def export_catalog(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    entity: Literal[tuple(EXPORTS)] | None = None,
+):
+    # ✅ streamed from a server-side cursor on its own session: memory
+    # stays flat however large the catalog, and the request-scoped
+    # session would already be closed while the body streams
+    if format == "csv":
+        if entity is None:
+            raise HTTPException(400, "CSV export needs an entity")
+        body = csv_stream(SessionLocal, entity)
+        media_type = "text/csv"
+    else:
+        body = ndjson_stream(SessionLocal, [entity] if entity else list(EXPORTS))
+        media_type = "application/x-ndjson"
+
+    filename = f"catalog-{entity or 'all'}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
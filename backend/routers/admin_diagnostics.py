@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from database.db import engine, async_engine, DB_ECHO
+from database.pool_stats import pool_status
+from utils.file_janitor import janitor
+from utils.security import password_hasher
+
+router = APIRouter(prefix="/admin/diagnostics", tags=["Admin Diagnostics"])
+
+
+# =========================
+# DATABASE POOLS
+# =========================
+@router.get("/db")
+def db_pool_stats():
+    return {
+        "echo": DB_ECHO,
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine),
+    }
+
+
+# =========================
+# FILE DELETION QUEUE
+# =========================
+@router.get("/files")
+def file_janitor_stats():
+    return janitor.stats()
+
+
+# =========================
+# PASSWORD HASHING
+# =========================
+@router.get("/passwords")
+def password_hasher_stats():
+    return password_hasher.stats()
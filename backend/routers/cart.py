@@ -1,56 +1,98 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database.db import get_db
-from models.cart import Cart
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import get_async_db
+from models.catalog import Cart, Product
+from schemas.catalog import CartAdd, CartUpdate, CartMerge
+from utils.cart import MAX_QUANTITY, upsert_items, merge_items, change_quantity, cart_items
 from utils.user_guard import user_required
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
+MAX_MERGE_ITEMS = 200
+
+
 @router.post("/add")
-def add_to_cart(
-    product_id: int,
-    quantity: int = 1,
+async def add_to_cart(
+    data: CartAdd,
     user_id: int = Depends(user_required),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    item = db.query(Cart).filter(
-        Cart.user_id == user_id,
-        Cart.product_id == product_id
-    ).first()
-
-    if item:
-        item.quantity += quantity
-    else:
-        db.add(Cart(
-            user_id=user_id,
-            product_id=product_id,
-            quantity=quantity
-        ))
-
-    db.commit()
+    if not 1 <= data.quantity <= MAX_QUANTITY:
+        raise HTTPException(400, f"Quantity must be between 1 and {MAX_QUANTITY}")
+
+    product = await db.scalar(
+        select(Product.id).where(Product.id == data.product_id, Product.is_visible == 1)
+    )
+    if not product:
+        raise HTTPException(404, "Product not found")
+
+    # ✅ one INSERT .. ON DUPLICATE KEY UPDATE, no read-modify-write
+    await db.run_sync(upsert_items, user_id, {data.product_id: data.quantity})
+    await db.commit()
     return {"message": "Added"}
 
 
+@router.post("/merge")
+async def merge_guest_cart(
+    data: CartMerge,
+    user_id: int = Depends(user_required),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ✅ whole guest cart at sign-in: one validation query, one upsert
+    if len(data.items) > MAX_MERGE_ITEMS:
+        raise HTTPException(400, f"At most {MAX_MERGE_ITEMS} items per merge")
+
+    quantities = {}
+    for item in data.items:
+        # guest quantities are uncapped in localStorage: clamp, don't reject
+        qty = min(max(item.quantity, 1), MAX_QUANTITY)
+        # the same product may appear once per selected type in the guest cart
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + qty
+
+    # products gone or hidden since they were added are dropped and
+    # reported back, so the client can tell the user
+    dropped = await db.run_sync(merge_items, user_id, quantities)
+    await db.commit()
+    return {
+        "items": await db.run_sync(cart_items, user_id),
+        "dropped": dropped
+    }
+
+
+@router.post("/update")
+async def update_cart_item(
+    data: CartUpdate,
+    user_id: int = Depends(user_required),
+    db: AsyncSession = Depends(get_async_db)
+):
+    changed = await db.run_sync(change_quantity, user_id, data.product_id, data.delta)
+    if not changed:
+        raise HTTPException(404, "Item not in cart")
+
+    await db.commit()
+    return {"message": "Updated"}
+
+
 @router.get("")
-def get_cart(
+async def get_cart(
     user_id: int = Depends(user_required),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(Cart)\
-        .filter(Cart.user_id == user_id)\
-        .all()
+    return await db.run_sync(cart_items, user_id)
 
 
 @router.delete("/remove/{product_id}")
-def remove_from_cart(
+async def remove_from_cart(
     product_id: int,
     user_id: int = Depends(user_required),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db.query(Cart).filter(
-        Cart.user_id == user_id,
-        Cart.product_id == product_id
-    ).delete()
-
-    db.commit()
+    await db.execute(
+        Cart.__table__.delete().where(
+            Cart.user_id == user_id,
+            Cart.product_id == product_id
+        )
+    )
+    await db.commit()
     return {"message": "Removed"}
@@ -1,86 +1,152 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import get_async_db
 from models.catalog import (
     CaseMainCategory,
     CasePhone,
     CaseModel,
-    CaseProduct,
     CaseVariant,
     CaseProductModelMap,
 )
+from utils.catalog_snapshot import catalog_cache
+from utils.http_cache import conditional
 
 router = APIRouter(prefix="/cases", tags=["Cases Public"])
 
 
 @router.get("/main-categories")
-def public_case_main_categories(db: Session = Depends(get_db)):
-    return db.query(CaseMainCategory).filter(CaseMainCategory.is_active == 1).all()
+async def public_case_main_categories(
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "cases_taxonomy", snapshot.etags["cases"])
+    if not_modified:
+        return not_modified
+    return snapshot.case_main_categories
 
 
 @router.get("/phones/by-main/{main_id}")
-def public_case_phones(main_id: int, db: Session = Depends(get_db)):
-    return db.query(CasePhone).filter(
-        CasePhone.case_main_category_id == main_id,
-        CasePhone.is_active == 1
-    ).all()
+async def public_case_phones(
+    main_id: int,
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "cases_taxonomy", snapshot.etags["cases"])
+    if not_modified:
+        return not_modified
+    return snapshot.case_phones.get(main_id, ())
 
 
 @router.get("/models/by-phone/{phone_id}")
-def public_case_models(phone_id: int, db: Session = Depends(get_db)):
-    return db.query(CaseModel).filter(
-        CaseModel.case_phone_id == phone_id,
-        CaseModel.is_active == 1
-    ).all()
+async def public_case_models(
+    phone_id: int,
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "cases_taxonomy", snapshot.etags["cases"])
+    if not_modified:
+        return not_modified
+    return snapshot.case_models.get(phone_id, ())
+
+
+@router.get("/tree")
+async def public_case_tree(
+    request: Request,
+    response: Response
+):
+    # ✅ whole active main -> phone -> model hierarchy in one response
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "cases_taxonomy", snapshot.etags["cases"])
+    if not_modified:
+        return not_modified
+    return snapshot.case_tree
 
 
 @router.get("/products")
-def public_case_products(db: Session = Depends(get_db)):
-    return db.query(CaseProduct).filter(CaseProduct.is_active == 1).order_by(CaseProduct.id.desc()).all()
+async def public_case_products(
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "cases_products", snapshot.etags["case_products"])
+    if not_modified:
+        return not_modified
+    return snapshot.case_products
+
+
+async def variants_for(db: AsyncSession, case_product_id: int):
+    rows = await db.execute(
+        select(CaseVariant.type_name, CaseVariant.image).where(
+            CaseVariant.case_product_id == case_product_id,
+            CaseVariant.is_active == 1
+        )
+    )
+    return {type_name: image for type_name, image in rows}
 
 
 @router.get("/product/{case_product_id}/variants")
-def public_case_variants(case_product_id: int, db: Session = Depends(get_db)):
-    variants = db.query(CaseVariant).filter(
-        CaseVariant.case_product_id == case_product_id,
-        CaseVariant.is_active == 1
-    ).all()
-    return {v.type_name: v.image for v in variants}
-
-
-@router.get("/product/{case_product_id}/allowed-models")
-def public_allowed_models(case_product_id: int, db: Session = Depends(get_db)):
-    # must be mapped + active
-    rows = db.query(CaseProductModelMap).filter(
-        CaseProductModelMap.case_product_id == case_product_id,
-        CaseProductModelMap.is_active == 1
-    ).all()
-
-    # filter: main/phone/model active
-    result = []
-    for r in rows:
-        main = db.get(CaseMainCategory, r.case_main_category_id)
-        phone = db.get(CasePhone, r.case_phone_id)
-        model = db.get(CaseModel, r.case_model_id)
-
-        if not main or not phone or not model:
-            continue
-
-        if main.is_active != 1: 
-            continue
-        if phone.is_active != 1:
-            continue
-        if model.is_active != 1:
-            continue
-
-        result.append({
+async def public_case_variants(case_product_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await variants_for(db, case_product_id)
+
+
+async def allowed_models_for(db: AsyncSession, case_product_id: int):
+    # ✅ mapping + main/phone/model names in one joined query;
+    # every level of the hierarchy must be active
+    rows = await db.execute(
+        select(
+            CaseProductModelMap,
+            CaseMainCategory.name,
+            CasePhone.name,
+            CaseModel.name
+        )
+        .join(CaseMainCategory, CaseMainCategory.id == CaseProductModelMap.case_main_category_id)
+        .join(CasePhone, CasePhone.id == CaseProductModelMap.case_phone_id)
+        .join(CaseModel, CaseModel.id == CaseProductModelMap.case_model_id)
+        .where(
+            CaseProductModelMap.case_product_id == case_product_id,
+            CaseProductModelMap.is_active == 1,
+            CaseMainCategory.is_active == 1,
+            CasePhone.is_active == 1,
+            CaseModel.is_active == 1
+        )
+        .order_by(CaseProductModelMap.id)
+    )
+
+    return [
+        {
             "map_id": r.id,
             "case_main_category_id": r.case_main_category_id,
             "case_phone_id": r.case_phone_id,
             "case_model_id": r.case_model_id,
-            "main_name": main.name,
-            "phone_name": phone.name,
-            "model_name": model.name,
-        })
+            "main_name": main_name,
+            "phone_name": phone_name,
+            "model_name": model_name,
+        }
+        for r, main_name, phone_name, model_name in rows
+    ]
 
-    return result
+
+@router.get("/product/{case_product_id}/allowed-models")
+async def public_allowed_models(case_product_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await allowed_models_for(db, case_product_id)
+
+
+# ---------- PRODUCT DETAIL ----------
+@router.get("/product/{case_product_id}")
+async def public_case_product_detail(case_product_id: int, db: AsyncSession = Depends(get_async_db)):
+    # ✅ product from the snapshot, then variants + allowed models:
+    # two queries no matter how many case products exist
+    snapshot = await catalog_cache.get_async()
+    product = snapshot.case_products_by_id.get(case_product_id)
+    if not product:
+        raise HTTPException(404, "Case product not found")
+
+    return {
+        "product": product,
+        "variants": await variants_for(db, case_product_id),
+        "allowed_models": await allowed_models_for(db, case_product_id),
+    }
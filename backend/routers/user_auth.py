@@ -1,26 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database.db import get_db
-from models.catalog import User
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import get_async_db
+from models.catalog import User, UserLogin
 from jose import jwt
 from pydantic import BaseModel
-from sqlalchemy import or_
 
-from utils.security import SECRET_KEY, ALGORITHM
+from utils.security import SECRET_KEY, ALGORITHM, password_hasher
+from utils.user_logins import EMAIL, login_key, login_kind, add_logins, taken_logins, email_taken
 
 router = APIRouter(prefix="/auth", tags=["User Auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def hash_password(password: str):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain, hashed):
-    return pwd_context.verify(plain, hashed)
-
 
 # ================= REGISTER =================
 class RegisterSchema(BaseModel):
@@ -30,18 +21,41 @@ class RegisterSchema(BaseModel):
 
 
 @router.post("/register")
-def register_user(data: RegisterSchema, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == data.email).first():
+async def register_user(data: RegisterSchema, db: AsyncSession = Depends(get_async_db)):
+    # "@" marks an email at login; a name with one could never sign in
+    if "@" in data.name or not login_key(data.name):
+        raise HTTPException(400, "Name must not be empty or contain @")
+    if "@" not in data.email:
+        raise HTTPException(400, "Invalid email")
+
+    existing = await db.scalar(select(User.id).where(User.email == data.email))
+    if existing or await db.run_sync(email_taken, data.email):
         raise HTTPException(400, "Email already exists")
 
+    # bcrypt is CPU-bound: hashed in the shared worker-process pool
     user = User(
         name=data.name,
         email=data.email,
-        password=hash_password(data.password)
+        password=await password_hasher.hash(data.password)
     )
 
     db.add(user)
-    db.commit()
+    try:
+        await db.flush()
+    except IntegrityError:
+        # same email registered concurrently (unique users.email)
+        await db.rollback()
+        raise HTTPException(400, "Email already exists")
+
+    # conflicting identifiers are skipped by the insert, then reported
+    await db.run_sync(add_logins, [user])
+    taken = await db.run_sync(taken_logins, user)
+    if taken:
+        await db.rollback()
+        if EMAIL in taken:
+            raise HTTPException(400, "Email already exists")
+        raise HTTPException(400, "Name already taken")
+    await db.commit()
 
     return {"message": "User registered successfully"}
 
@@ -51,24 +65,30 @@ class LoginSchema(BaseModel):
     email: str
     password: str
 @router.post("/login")
-def login_user(data: LoginSchema, db: Session = Depends(get_db)):
-    user = (
-        db.query(User)
-        .filter(
-            or_(
-                User.email == data.email,
-                User.name == data.email   # allow username login
-            )
-        )
-        .first()
+async def login_user(data: LoginSchema, db: AsyncSession = Depends(get_async_db)):
+    # ✅ email or username through one primary-key probe on user_logins
+    kind = login_kind(data.email)
+    user = await db.scalar(
+        select(User)
+        .join(UserLogin, UserLogin.user_id == User.id)
+        .where(UserLogin.kind == kind, UserLogin.identifier == login_key(data.email))
     )
+    if not user and kind == EMAIL:
+        # rows backfill_user_logins.py has not reached yet (unique email index)
+        user = await db.scalar(select(User).where(User.email == data.email))
 
     if not user:
         raise HTTPException(401, "Invalid credentials")
 
-    if not verify_password(data.password, user.password):
+    ok, new_hash = await password_hasher.verify_and_update(data.password, user.password)
+    if not ok:
         raise HTTPException(401, "Invalid credentials")
 
+    # ✅ stored with an outdated cost/scheme: upgrade while we have the password
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
     token = jwt.encode(
         {"sub": str(user.id)},
         SECRET_KEY,
@@ -1,91 +1,219 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import and_, false, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.db import get_db
-from models.catalog import MainCategory, SubCategory, Product, ProductImage
+from database.db import get_async_db
+from models.catalog import SubCategory, Product
+from utils.pagination import encode_cursor, decode_sort_cursor
+from utils.catalog_snapshot import (
+    CatalogSnapshot,
+    catalog_cache,
+    visible_products_query,
+    product_row,
+    type_images_for,
+)
+from utils.http_cache import conditional
+from utils.search_index import search_index
 
 router = APIRouter(prefix="/catalog", tags=["User Catalog"])
 
 # ---------- MAIN CATEGORIES ----------
 @router.get("/categories")
-def user_categories(db: Session = Depends(get_db)):
-    return db.query(MainCategory)\
-        .filter(MainCategory.is_active.in_([1]))\
-        .all()
+async def user_categories(
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "catalog_categories", snapshot.etags["categories"])
+    if not_modified:
+        return not_modified
+    return snapshot.categories
 
 
 # ---------- SUB CATEGORIES ----------
 @router.get("/categories/{main_id}/sub")
-def user_sub_categories(main_id: int, db: Session = Depends(get_db)):
-    return db.query(SubCategory)\
-        .join(MainCategory)\
-        .filter(
-            SubCategory.main_category_id == main_id,
-            SubCategory.is_active.in_([1]),
-            MainCategory.is_active.in_([1])
-        )\
+async def user_sub_categories(
+    main_id: int,
+    request: Request,
+    response: Response
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = conditional(request, response, "catalog_sub_categories", snapshot.etags["categories"])
+    if not_modified:
+        return not_modified
+    return snapshot.sub_categories.get(main_id, ())
+
+# ---------- PRODUCT LISTINGS ----------
+# ✅ keyset paging: every sort ends on Product.id so the order is total
+PRODUCT_SORTS = {
+    "newest": [],
+    "price_asc": [(Product.price, False)],
+    "price_desc": [(Product.price, True)],
+    "name": [(Product.name, False)],
+    "discount": [(Product.discount_percent, True)],
+}
+
+
+def product_list_params(
+    cursor: str | None = None,
+    limit: int = Query(24, ge=1, le=100),
+    sort: Literal["newest", "price_asc", "price_desc", "name", "discount"] = "newest",
+    main_category_id: int | None = None,
+    sub_category_id: int | None = None,
+    min_price: int | None = Query(None, ge=0),
+    max_price: int | None = Query(None, ge=0),
+    discounted: bool = False,
+):
+    return {
+        "cursor": cursor,
+        "limit": limit,
+        "sort": sort,
+        "main_category_id": main_category_id,
+        "sub_category_id": sub_category_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "discounted": discounted,
+    }
+
+
+def sort_key(sort: str):
+    # (column, descending) pairs, id last as the tie-breaker
+    keys = PRODUCT_SORTS[sort]
+    id_desc = keys[0][1] if keys else True
+    return keys + [(Product.id, id_desc)]
+
+
+def after_cursor(keys, values):
+    # (k1, k2, ..) > (v1, v2, ..) spelled out so it works on MySQL and SQLite.
+    # price/name/discount are nullable: both databases sort NULL first
+    # ascending and last descending, so a null cursor value is spelled out
+    col, value = keys[0][0], values[0]
+    desc = keys[0][1]
+    if value is None:
+        past = false() if desc else col.isnot(None)
+        same = col.is_(None)
+    else:
+        past = or_(col < value, col.is_(None)) if desc else col > value
+        same = col == value
+    if len(keys) == 1:
+        return past
+    return or_(past, and_(same, after_cursor(keys[1:], values[1:])))
+
+
+def page_products(db: Session, params: dict, snapshot: CatalogSnapshot):
+    # ✅ served from the in-process snapshot unless the catalog outgrew it
+    if snapshot.products is not None:
+        return snapshot.page_products(params)
+
+    query = visible_products_query(db)
+
+    if params["main_category_id"] is not None:
+        query = query\
+            .join(SubCategory, Product.sub_category_id == SubCategory.id)\
+            .filter(SubCategory.main_category_id == params["main_category_id"])
+    if params["sub_category_id"] is not None:
+        query = query.filter(Product.sub_category_id == params["sub_category_id"])
+    if params["min_price"] is not None:
+        query = query.filter(Product.price >= params["min_price"])
+    if params["max_price"] is not None:
+        query = query.filter(Product.price <= params["max_price"])
+    if params["discounted"]:
+        query = query.filter(Product.discount_percent > 0)
+
+    sort = params["sort"]
+    keys = sort_key(sort)
+
+    if params["cursor"]:
+        values = decode_sort_cursor(params["cursor"], sort)
+        query = query.filter(after_cursor(keys, values))
+
+    limit = params["limit"]
+    rows = query\
+        .order_by(*[col.desc() if desc else col.asc() for col, desc in keys])\
+        .limit(limit + 1)\
         .all()
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(
+            [sort] + [getattr(last, col.key) for col, _ in keys]
+        )
+
+    return {
+        "items": [product_row(*row) for row in rows],
+        "next_cursor": next_cursor
+    }
+
+
+def products_not_modified(request: Request, response: Response, snapshot: CatalogSnapshot):
+    # the snapshot hash only covers products while it holds them
+    etag = snapshot.etags["products"] if snapshot.products is not None else None
+    return conditional(request, response, "catalog_products", etag)
+
+
 @router.get("/products")
-def user_all_products(db: Session = Depends(get_db)):
-    products = db.query(Product)\
-        .join(SubCategory)\
-        .join(MainCategory)\
-        .filter(
-            Product.is_available.in_([1]),
-            SubCategory.is_active.in_([1]),
-            MainCategory.is_active.in_([1])
-        )\
-        .all()
+async def user_all_products(
+    request: Request,
+    response: Response,
+    params: dict = Depends(product_list_params),
+    db: AsyncSession = Depends(get_async_db)
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = products_not_modified(request, response, snapshot)
+    if not_modified:
+        return not_modified
+    return await db.run_sync(page_products, params, snapshot)
+
 
-    result = []
-    for p in products:
-        # ✅ Take type1 as main image
-        img = db.query(ProductImage).filter(
-            ProductImage.product_id == p.id,
-            ProductImage.type_name == "type1"
-        ).first()
-
-        result.append({
-            "id": p.id,
-            "name": p.name,
-            "subtitle": p.subtitle,
-            "price": p.price,
-            "discount_percent": p.discount_percent,
-            "sub_category_id": p.sub_category_id,
-            "image": img.image if img else None   # ✅ now UI works
-        })
-
-    return result
 # ---------- PRODUCTS BY SUB ----------
 @router.get("/products/sub/{sub_id}")
-def user_products_by_sub(sub_id: int, db: Session = Depends(get_db)):
-    products = db.query(Product)\
-        .join(SubCategory)\
-        .join(MainCategory)\
-        .filter(
-            Product.sub_category_id == sub_id,
-            Product.is_available.in_([1]),
-            SubCategory.is_active.in_([1]),
-            MainCategory.is_active.in_([1])
-        )\
-        .all()
+async def user_products_by_sub(
+    sub_id: int,
+    request: Request,
+    response: Response,
+    params: dict = Depends(product_list_params),
+    db: AsyncSession = Depends(get_async_db)
+):
+    snapshot = await catalog_cache.get_async()
+    not_modified = products_not_modified(request, response, snapshot)
+    if not_modified:
+        return not_modified
+    return await db.run_sync(page_products, {**params, "sub_category_id": sub_id}, snapshot)
+
+
+# ---------- TYPE IMAGES (BATCH) ----------
+MAX_BATCH_IDS = 100
+
+
+@router.get("/products/type-images")
+async def user_type_images(
+    ids: list[int] = Query(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ✅ public twin of the admin batch: hidden products are left out
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(400, f"At most {MAX_BATCH_IDS} ids per request")
+
+    return await db.run_sync(type_images_for, ids, True)
 
-    result = []
-    for p in products:
-        img = db.query(ProductImage).filter(
-            ProductImage.product_id == p.id,
-            ProductImage.type_name == "type1"
-        ).first()
-
-        result.append({
-            "id": p.id,
-            "name": p.name,
-            "subtitle": p.subtitle,
-            "price": p.price,
-            "discount_percent": p.discount_percent,
-            "sub_category_id": p.sub_category_id,
-            "image": img.image if img else None
-        })
-
-    return result
 
+# ---------- SEARCH ----------
+@router.get("/search")
+async def user_search(
+    q: str = Query(..., min_length=1, max_length=100),
+    page: int = Query(1, ge=1, le=100),
+    limit: int = Query(20, ge=1, le=50)
+):
+    # ✅ ranked over products + case products; hidden rows never match
+    if not search_index.built:
+        # first search builds the index in a worker thread, off the loop
+        await asyncio.to_thread(search_index.ensure_built)
+    else:
+        # picks up writes other workers handled (reindexed in the background)
+        search_index.refresh()
+    result = search_index.search(q, offset=(page - 1) * limit, limit=limit)
+    return {**result, "page": page}
@@ -15,3 +15,22 @@ class ModelCreate(BaseModel):
     subtitle: str
     price: int
     sub_category_id: int
+
+
+class BulkToggle(BaseModel):
+    ids: list[int]
+    state: bool
+
+
+class CartAdd(BaseModel):
+    product_id: int
+    quantity: int = 1
+
+
+class CartUpdate(BaseModel):
+    product_id: int
+    delta: int
+
+
+class CartMerge(BaseModel):
+    items: list[CartAdd]
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+# the app's engines are created at import time from DATABASE_URL: point
+# them at a throwaway SQLite file before anything imports database.db
+TEST_DB = os.path.join(tempfile.mkdtemp(prefix="catalog-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+# single process: no shared cache_versions polling
+os.environ["CATALOG_VERSION_POLL_SECONDS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database.base import Base
+from database.db import engine, async_engine, SessionLocal
+from routers import admin_catalog, user_catalog, cart
+from utils.catalog_snapshot import catalog_cache
+from utils.file_janitor import janitor
+
+
+@event.listens_for(engine, "connect")
+def enforce_foreign_keys(dbapi_connection, connection_record):
+    # SQLite skips foreign key checks unless asked; MySQL always runs them
+    dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+
+@pytest.fixture(scope="session")
+def client():
+    # one client (one event loop) for the session: the async engine's
+    # pooled connections belong to the loop that opened them
+    app = FastAPI()
+    app.include_router(admin_catalog.router)
+    app.include_router(user_catalog.router)
+    app.include_router(cart.router)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(monkeypatch):
+    # fresh schema per test; released files are not handed to the janitor
+    # (its background statements would land in the counts)
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(janitor, "enqueue", lambda paths: None)
+    catalog_cache.invalidate()
+
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def statements():
+    """Every SQL statement sent on either engine while the test runs."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    yield captured
+    for target in targets:
+        event.remove(target, "before_cursor_execute", record)
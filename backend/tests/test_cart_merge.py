@@ -0,0 +1,64 @@
+import pytest
+
+from models.catalog import MainCategory, SubCategory, Product, User
+from utils.cart import MAX_QUANTITY
+from utils.security import create_access_token
+
+
+@pytest.fixture
+def shop(db):
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    sub = SubCategory(
+        name="Cases",
+        image="static/products/sub.jpg",
+        main_category_id=main.id,
+        is_active=True,
+        is_visible=True
+    )
+    db.add(sub)
+    db.flush()
+    visible = Product(name="Leather case", price=100, sub_category_id=sub.id, is_available=True, is_visible=True)
+    hidden = Product(name="Old case", price=100, sub_category_id=sub.id, is_available=False, is_visible=False)
+    user = User(name="buyer", email="buyer@example.com", password="x")
+    db.add_all([visible, hidden, user])
+    db.commit()
+    return {
+        "visible": visible.id,
+        "hidden": hidden.id,
+        "auth": {"Authorization": "Bearer " + create_access_token({"sub": str(user.id)})},
+    }
+
+
+def merge(client, shop, items):
+    return client.post("/cart/merge", json={"items": items}, headers=shop["auth"])
+
+
+def test_merge_reports_dropped_products(client, shop):
+    response = merge(client, shop, [
+        {"product_id": shop["visible"], "quantity": 2},
+        {"product_id": shop["hidden"], "quantity": 1},
+        {"product_id": 999, "quantity": 1},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [(i["product_id"], i["quantity"]) for i in body["items"]] == [(shop["visible"], 2)]
+    assert body["dropped"] == [shop["hidden"], 999]
+
+
+def test_merge_clamps_guest_quantities(client, shop):
+    # localStorage quantities are uncapped: one huge line must not block
+    # the rest of the guest cart
+    response = merge(client, shop, [
+        {"product_id": shop["visible"], "quantity": 500},
+        {"product_id": shop["visible"], "quantity": 0},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert [(i["product_id"], i["quantity"]) for i in body["items"]] == [(shop["visible"], MAX_QUANTITY)]
+    assert body["dropped"] == []
+
+    # merging again stays within the cap
+    response = merge(client, shop, [{"product_id": shop["visible"], "quantity": 3}])
+    assert response.json()["items"][0]["quantity"] == MAX_QUANTITY
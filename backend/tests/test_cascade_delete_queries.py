@@ -0,0 +1,78 @@
+import pytest
+
+from models.catalog import MainCategory, SubCategory, Product, ProductImage
+
+# (sub categories, products per sub category)
+SMALL = (1, 1)
+LARGE = (6, 12)
+
+
+def add_hierarchy(db, subs, products):
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    for i in range(subs):
+        sub = SubCategory(
+            name=f"Sub {i}",
+            image=f"static/products/sub_{main.id}_{i}.jpg",
+            main_category_id=main.id,
+            is_active=True,
+            is_visible=True
+        )
+        db.add(sub)
+        db.flush()
+        items = [
+            Product(name=f"Product {j}", price=100, sub_category_id=sub.id, is_available=True)
+            for j in range(products)
+        ]
+        db.add_all(items)
+        db.flush()
+        db.add_all(
+            ProductImage(product_id=p.id, type_name=t, image=f"static/products/{p.id}_{t}.jpg")
+            for p in items for t in ("type1", "type2")
+        )
+    db.commit()
+    return main.id
+
+
+def remaining(db):
+    return (
+        db.query(MainCategory).count(),
+        db.query(SubCategory).count(),
+        db.query(Product).count(),
+        db.query(ProductImage).count(),
+    )
+
+
+def delete_main(client, db, statements, size):
+    main_id = add_hierarchy(db, *size)
+    statements.clear()
+    assert client.delete(f"/admin/catalog/main-category/{main_id}").status_code == 200
+    count = len(statements)
+    assert remaining(db) == (0, 0, 0, 0)
+    return count
+
+
+def delete_sub(client, db, statements, size):
+    main_id = add_hierarchy(db, *size)
+    sub_id = db.query(SubCategory.id).filter(SubCategory.main_category_id == main_id).first()[0]
+    statements.clear()
+    assert client.delete(f"/admin/catalog/sub-category/{sub_id}").status_code == 200
+    count = len(statements)
+
+    subs, products = size
+    assert remaining(db) == (1, subs - 1, (subs - 1) * products, (subs - 1) * products * 2)
+    return count
+
+
+@pytest.mark.parametrize("delete", [delete_main, delete_sub], ids=["main-category", "sub-category"])
+def test_cascade_delete_statements_do_not_grow_with_hierarchy(client, db, statements, delete):
+    small = delete(client, db, statements, SMALL)
+    db.query(MainCategory).delete()
+    db.query(SubCategory).delete()
+    db.query(Product).delete()
+    db.query(ProductImage).delete()
+    db.commit()
+
+    large = delete(client, db, statements, LARGE)
+    assert small == large
@@ -0,0 +1,72 @@
+import pytest
+
+import utils.catalog_snapshot as catalog_snapshot
+from models.catalog import MainCategory, SubCategory, Product
+from utils.pagination import encode_cursor
+
+# crafted cursors whose sort key has the wrong type for its sort
+BAD_CURSORS = [
+    ["price_asc", "abc", 1],
+    ["price_desc", "abc", 1],
+    ["discount", "abc", 1],
+    ["price_asc", True, 1],
+    ["name", 5, 1],
+    ["name", ["a"], 1],
+    ["newest", "1"],
+    ["price_asc", 10, "1"],
+]
+
+
+@pytest.fixture
+def catalog(db):
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    sub = SubCategory(
+        name="Cases",
+        image="static/products/sub.jpg",
+        main_category_id=main.id,
+        is_active=True,
+        is_visible=True
+    )
+    db.add(sub)
+    db.flush()
+    db.add_all(
+        Product(name=name, price=price, sub_category_id=sub.id, is_available=True, is_visible=True)
+        for name, price in [("Leather case", 300), ("glass cover", None), ("Charger", 150)]
+    )
+    db.commit()
+
+
+@pytest.fixture(params=["snapshot", "database"])
+def source(request, monkeypatch):
+    if request.param == "database":
+        # over the snapshot limit the listings page straight from the database
+        monkeypatch.setattr(catalog_snapshot, "MAX_PRODUCTS", 0)
+    return request.param
+
+
+@pytest.mark.parametrize("values", BAD_CURSORS, ids=lambda v: repr(v))
+def test_cursor_with_wrong_key_type_is_rejected(client, catalog, source, values):
+    response = client.get(
+        "/catalog/products",
+        params={"sort": values[0], "cursor": encode_cursor(values)}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("values", [
+    ["price_asc", None, 2],
+    ["price_desc", 150, 3],
+    ["name", "charger", 3],
+    ["name", None, 1],
+    ["discount", 0, 3],
+    ["newest", 3],
+])
+def test_cursor_with_matching_or_null_key_is_accepted(client, catalog, source, values):
+    response = client.get(
+        "/catalog/products",
+        params={"sort": values[0], "cursor": encode_cursor(values)}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,61 @@
+import pytest
+
+from models.catalog import MainCategory, SubCategory, Product, ProductImage, User, Cart
+
+
+@pytest.fixture
+def catalog(db):
+    """Two products in one sub category, both in a user's cart, plus a
+    product in another sub category that stays."""
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    subs = [
+        SubCategory(
+            name=name,
+            image=f"static/products/{name}.jpg",
+            main_category_id=main.id,
+            is_active=True,
+            is_visible=True
+        )
+        for name in ("cases", "chargers")
+    ]
+    db.add_all(subs)
+    db.flush()
+    products = [
+        Product(name=name, price=100, sub_category_id=sub.id, is_available=True, is_visible=True)
+        for name, sub in [("Leather case", subs[0]), ("Glass case", subs[0]), ("Charger", subs[1])]
+    ]
+    user = User(name="buyer", email="buyer@example.com", password="x")
+    db.add_all(products + [user])
+    db.flush()
+    db.add_all(
+        ProductImage(product_id=p.id, type_name="type1", image=f"static/products/{p.id}.jpg")
+        for p in products
+    )
+    db.add_all(Cart(user_id=user.id, product_id=p.id, quantity=2) for p in products)
+    db.commit()
+    return {"main": main.id, "sub": subs[0].id, "products": [p.id for p in products]}
+
+
+def cart_products(db):
+    return sorted(product_id for (product_id,) in db.query(Cart.product_id))
+
+
+def test_delete_product_in_a_cart(client, db, catalog):
+    leather, glass, charger = catalog["products"]
+    assert client.delete(f"/admin/catalog/product/{leather}").status_code == 200
+    assert cart_products(db) == [glass, charger]
+    assert db.get(Product, leather) is None
+
+
+def test_delete_sub_category_with_products_in_a_cart(client, db, catalog):
+    _, _, charger = catalog["products"]
+    assert client.delete(f"/admin/catalog/sub-category/{catalog['sub']}").status_code == 200
+    assert cart_products(db) == [charger]
+
+
+def test_delete_main_category_with_products_in_a_cart(client, db, catalog):
+    assert client.delete(f"/admin/catalog/main-category/{catalog['main']}").status_code == 200
+    assert cart_products(db) == []
+    assert db.query(Product).count() == 0
@@ -0,0 +1,72 @@
+import pytest
+
+import utils.catalog_snapshot as catalog_snapshot
+from models.catalog import MainCategory, SubCategory, Product, ProductImage
+from utils.catalog_snapshot import catalog_cache
+
+
+def add_sub_category(db):
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    sub = SubCategory(
+        name="Cases",
+        image="static/products/sub.jpg",
+        main_category_id=main.id,
+        is_active=True,
+        is_visible=True
+    )
+    db.add(sub)
+    db.commit()
+    return sub.id
+
+
+def add_products(db, sub_id, count):
+    products = [
+        Product(
+            name=f"Case {i}",
+            price=100 + i,
+            sub_category_id=sub_id,
+            is_available=True,
+            is_visible=True
+        )
+        for i in range(count)
+    ]
+    db.add_all(products)
+    db.flush()
+    db.add_all(
+        ProductImage(product_id=p.id, type_name=t, image=f"static/products/{p.id}_{t}.jpg")
+        for p in products for t in ("type1", "type2")
+    )
+    db.commit()
+
+
+def listing(client, statements, path):
+    # cold cache, so the snapshot build is counted too
+    catalog_cache.invalidate()
+    statements.clear()
+    response = client.get(path, params={"limit": 100})
+    assert response.status_code == 200
+    return len(statements), response.json()["items"]
+
+
+@pytest.mark.parametrize("from_snapshot", [True, False], ids=["snapshot", "database"])
+def test_listing_statements_do_not_grow_with_catalog(client, db, statements, monkeypatch, from_snapshot):
+    if not from_snapshot:
+        # over the snapshot limit the listings page straight from the database
+        monkeypatch.setattr(catalog_snapshot, "MAX_PRODUCTS", 0)
+
+    sub_id = add_sub_category(db)
+    counts = []
+    for total in (3, 60):
+        add_products(db, sub_id, total - db.query(Product).count())
+
+        for path in ("/catalog/products", f"/catalog/products/sub/{sub_id}"):
+            count, items = listing(client, statements, path)
+            assert len(items) == total
+            # every product carries its type1 cover
+            assert all(item["image"] == f"static/products/{item['id']}_type1.jpg" for item in items)
+            counts.append((path, count))
+
+    small, large = counts[:2], counts[2:]
+    assert small == large
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import utils.catalog_snapshot as catalog_snapshot
+from database.db import ASYNC_DATABASE_URL
+from models.catalog import MainCategory, SubCategory, Product, CacheVersion
+from utils.catalog_snapshot import catalog_cache
+from utils.search_index import SearchIndex
+
+
+def add_products(db, names):
+    main = MainCategory(name="Phones", image="static/products/main.jpg", is_active=True)
+    db.add(main)
+    db.flush()
+    sub = SubCategory(
+        name="Cases",
+        image="static/products/sub.jpg",
+        main_category_id=main.id,
+        is_active=True,
+        is_visible=True
+    )
+    db.add(sub)
+    db.flush()
+    products = [
+        Product(name=name, price=100, sub_category_id=sub.id, is_available=True, is_visible=True)
+        for name in names
+    ]
+    db.add_all(products)
+    db.commit()
+    return [p.id for p in products]
+
+
+def test_concurrent_reindex_from_async_routes_does_not_hang(db):
+    # the async admin routes reindex through run_sync: the query suspends
+    # the caller on the event loop, so no lock may be held across it
+    ids = add_products(db, ["Leather case", "Glass cover"])
+    index = SearchIndex()
+    index.ensure_built()
+
+    async def reindex_concurrently():
+        engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        try:
+            async def reindex(product_id):
+                async with AsyncSession(engine) as session:
+                    await session.run_sync(index.index_products, Product.id == product_id)
+
+            await asyncio.gather(*(reindex(product_id) for product_id in ids * 4))
+        finally:
+            await engine.dispose()
+
+    worker = threading.Thread(target=asyncio.run, args=(reindex_concurrently(),), daemon=True)
+    worker.start()
+    worker.join(10)
+    assert not worker.is_alive(), "concurrent run_sync reindex hung the event loop"
+    assert index.search("case")["total"] == 1
+
+
+def test_writes_from_another_worker_reach_the_index(db, monkeypatch):
+    monkeypatch.setattr(catalog_snapshot, "VERSION_POLL_SECONDS", 0.01)
+    db.add(CacheVersion(name="catalog", version=0))
+    ids = add_products(db, ["Leather case", "Glass cover"])
+
+    index = SearchIndex()
+    index.ensure_built()
+    catalog_cache._poll_shared()
+    assert index.search("leather")["total"] == 1
+
+    # another worker hides the product and bumps the shared counter; this
+    # process never sees the write itself
+    db.execute(update(Product).where(Product.id == ids[0]).values(is_visible=False))
+    db.execute(update(CacheVersion).values(version=CacheVersion.version + 1))
+    db.commit()
+
+    deadline = time.monotonic() + 10
+    while index.search("leather")["total"] and time.monotonic() < deadline:
+        index.refresh()
+        time.sleep(0.02)
+
+    assert index.search("leather")["total"] == 0
+    assert index.search("glass")["total"] == 1
+    assert index.reindexes >= 1
@@ -0,0 +1,112 @@
+from sqlalchemy import and_, case, select, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from models.catalog import Cart, Product, ProductImage
+from utils.derivatives import thumbnail_of
+
+# One cart row per (user, product): uq_cart_user_product. Adds are a single
+# upsert against that key, so two concurrent adds of the same product both
+# land instead of one overwriting the other.
+
+# per-line cap, enforced inside the statements (concurrent adds included)
+MAX_QUANTITY = 99
+
+
+def capped(qty):
+    # qty clamped to 1..MAX_QUANTITY as a SQL expression
+    return case((qty > MAX_QUANTITY, MAX_QUANTITY), (qty < 1, 1), else_=qty)
+
+
+def upsert_items(db: Session, user_id: int, quantities: dict) -> None:
+    """Add {product_id: quantity} to the user's cart in one statement."""
+    rows = [
+        {"user_id": user_id, "product_id": product_id, "quantity": min(qty, MAX_QUANTITY)}
+        for product_id, qty in quantities.items()
+    ]
+    if not rows:
+        return
+
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(Cart).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            quantity=capped(Cart.quantity + stmt.inserted.quantity)
+        )
+    else:
+        # SQLite (dev/test databases): same semantics via ON CONFLICT
+        stmt = sqlite.insert(Cart).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id, Cart.product_id],
+            set_={"quantity": capped(Cart.quantity + stmt.excluded.quantity)}
+        )
+    db.execute(stmt)
+
+
+def merge_items(db: Session, user_id: int, quantities: dict) -> list[int]:
+    """Upsert a whole guest cart; returns the product ids left out.
+
+    Ids and availability are checked in one query, and only visible
+    products are written, all in one multi-row upsert.
+    """
+    valid = set(db.scalars(
+        select(Product.id)
+        .where(Product.id.in_(quantities), Product.is_visible == 1)
+    )) if quantities else set()
+
+    upsert_items(db, user_id, {
+        product_id: qty for product_id, qty in quantities.items() if product_id in valid
+    })
+    return [product_id for product_id in quantities if product_id not in valid]
+
+
+def change_quantity(db: Session, user_id: int, product_id: int, delta: int) -> bool:
+    # in-place UPDATE within 1..MAX_QUANTITY; False when the item is not in the cart
+    result = db.execute(
+        update(Cart)
+        .where(Cart.user_id == user_id, Cart.product_id == product_id)
+        .values(quantity=capped(Cart.quantity + delta))
+    )
+    return result.rowcount > 0
+
+
+def cart_items(db: Session, user_id: int) -> list[dict]:
+    # ✅ cart rows with product details and type1 cover in one query
+    rows = db.execute(
+        select(
+            Cart.product_id,
+            Cart.quantity,
+            Product.name,
+            Product.subtitle,
+            Product.price,
+            Product.discount_percent,
+            Product.is_visible,
+            ProductImage.image,
+            ProductImage.derivatives,
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .outerjoin(
+            ProductImage,
+            and_(
+                ProductImage.product_id == Product.id,
+                ProductImage.type_name == "type1"
+            )
+        )
+        .where(Cart.user_id == user_id)
+        .order_by(Cart.id)
+    ).all()
+
+    return [
+        {
+            "product_id": r.product_id,
+            "quantity": r.quantity,
+            "name": r.name,
+            "subtitle": r.subtitle,
+            "price": r.price,
+            "discount_percent": r.discount_percent,
+            # hidden since it was added: shown, but not orderable
+            "available": bool(r.is_visible),
+            "image": r.image,
+            "thumbnail": thumbnail_of(r.derivatives),
+        }
+        for r in rows
+    ]
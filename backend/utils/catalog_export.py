@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+import os
+
+from sqlalchemy import select
+
+from models.catalog import (
+    MainCategory,
+    SubCategory,
+    Product,
+    ProductImage,
+    CaseProduct,
+    CaseProductModelMap,
+)
+
+# rows fetched (and emitted) per round trip of the server-side cursor
+YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+
+
+def columns(model, *exclude):
+    return [c for c in model.__table__.columns if c.key not in exclude]
+
+
+# entity -> columns, streamed in primary key order; plain column selects
+# (no ORM objects) so nothing piles up in the session identity map
+EXPORTS = {
+    "main_categories": columns(MainCategory),
+    "sub_categories": columns(SubCategory),
+    "products": columns(Product),
+    "product_images": columns(ProductImage, "derivatives"),
+    "case_products": columns(CaseProduct),
+    "case_mappings": columns(CaseProductModelMap),
+}
+
+
+def stream_rows(db, entity: str):
+    """Yield lists of row dicts, one list per cursor fetch."""
+    cols = EXPORTS[entity]
+    result = db.execute(
+        select(*cols)
+        .order_by(cols[0].table.c.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    keys = [c.key for c in cols]
+    for rows in result.partitions():
+        yield [dict(zip(keys, row)) for row in rows]
+
+
+def ndjson_stream(session_factory, entities):
+    # one JSON object per line, tagged with its entity
+    db = session_factory()
+    try:
+        for entity in entities:
+            for rows in stream_rows(db, entity):
+                yield "".join(
+                    json.dumps({"entity": entity, **row}, default=str) + "\n"
+                    for row in rows
+                )
+    finally:
+        db.close()
+
+
+def csv_stream(session_factory, entity: str):
+    db = session_factory()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([c.key for c in EXPORTS[entity]])
+        yield buffer.getvalue()
+
+        for rows in stream_rows(db, entity):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(row.values() for row in rows)
+            yield buffer.getvalue()
+    finally:
+        db.close()
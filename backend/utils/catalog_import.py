@@ -0,0 +1,288 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import zipfile
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from models.catalog import SubCategory, Product, ProductImage
+from utils.derivatives import make_derivatives
+from utils.media_store import acquire_many
+from utils.uploads import store_file
+from utils.visibility import sync_product_visibility
+
+# Bulk product import: a CSV/JSON manifest (one product per row) plus an
+# optional zip holding the images its type1..type5 columns name.
+# Everything is validated before anything is written; the products and
+# images then go in with chunked executemany INSERTs in one transaction.
+
+MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "5000"))
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+MAX_IMAGE_BYTES = int(os.getenv("IMPORT_MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+
+TYPE_NAMES = ("type1", "type2", "type3", "type4", "type5")
+TRUE_VALUES = {"1", "true", "yes", "y"}
+FALSE_VALUES = {"0", "false", "no", "n"}
+
+
+def chunks(items, size=CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def rejected(errors):
+    return HTTPException(422, {"message": "Import rejected", "errors": errors})
+
+
+# =========================
+# MANIFEST
+# =========================
+def parse_manifest(filename: str | None, data: bytes) -> list[dict]:
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(400, "Manifest must be UTF-8")
+
+    if (filename or "").lower().endswith(".json") or text.lstrip().startswith("["):
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            raise HTTPException(400, "Manifest is not valid JSON")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise HTTPException(400, "JSON manifest must be a list of objects")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        rows = [
+            {(k or "").strip(): v for k, v in row.items()}
+            for row in reader
+        ]
+
+    if not rows:
+        raise HTTPException(400, "Manifest is empty")
+    if len(rows) > MAX_ROWS:
+        raise HTTPException(400, f"At most {MAX_ROWS} products per import")
+    return rows
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _int(row, field, errors, default=None, low=0, high=None):
+    value = _text(row.get(field))
+    if not value:
+        if default is None:
+            errors.append(f"{field} is required")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        errors.append(f"{field} must be a whole number")
+        return default
+    if number < low or (high is not None and number > high):
+        errors.append(f"{field} out of range")
+    return number
+
+
+def _flag(row, field, errors, default=True):
+    value = _text(row.get(field)).lower()
+    if not value:
+        return default
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    errors.append(f"{field} must be true or false")
+    return default
+
+
+def archive_members(archive: zipfile.ZipFile | None) -> dict:
+    # exact member name, or the bare file name when it is unambiguous
+    if archive is None:
+        return {}
+    members, by_base = {}, {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        members[info.filename] = info
+        by_base.setdefault(os.path.basename(info.filename), []).append(info)
+    for base, infos in by_base.items():
+        if len(infos) == 1:
+            members.setdefault(base, infos[0])
+    return members
+
+
+def validate_rows(db: Session, rows: list[dict], members: dict):
+    """-> (products, errors); row numbers count from 1 = first product."""
+    sub_ids = set()
+    for row in rows:
+        try:
+            sub_ids.add(int(_text(row.get("sub_category_id"))))
+        except ValueError:
+            pass
+    known_subs = set(db.scalars(
+        select(SubCategory.id).where(SubCategory.id.in_(sub_ids))
+    )) if sub_ids else set()
+
+    products, errors, seen = [], [], {}
+    for n, row in enumerate(rows, start=1):
+        row_errors = []
+
+        name = _text(row.get("name"))
+        if not name:
+            row_errors.append("name is required")
+        elif len(name) > 100:
+            row_errors.append("name is longer than 100 characters")
+        subtitle = _text(row.get("subtitle"))
+        if len(subtitle) > 200:
+            row_errors.append("subtitle is longer than 200 characters")
+
+        price = _int(row, "price", row_errors)
+        discount = _int(row, "discount_percent", row_errors, default=0, high=100)
+        sub_id = _int(row, "sub_category_id", row_errors)
+        if sub_id is not None and sub_id not in known_subs:
+            row_errors.append(f"sub category {sub_id} does not exist")
+        available = _flag(row, "is_available", row_errors)
+
+        # (sub, name) finds the new ids after the INSERT; see write_import
+        key = (sub_id, name)
+        if name and key in seen:
+            row_errors.append(f"duplicate of row {seen[key]} (same name and sub category)")
+        seen.setdefault(key, n)
+
+        images = {}
+        for type_name in TYPE_NAMES:
+            member = _text(row.get(type_name))
+            if not member:
+                continue
+            info = members.get(member)
+            if info is None:
+                row_errors.append(f"{type_name}: {member} is not in the image archive")
+            elif info.file_size > MAX_IMAGE_BYTES:
+                row_errors.append(f"{type_name}: {member} is larger than {MAX_IMAGE_BYTES} bytes")
+            else:
+                images[type_name] = info.filename
+
+        if row_errors:
+            errors.append({"row": n, "errors": row_errors})
+            continue
+        products.append({
+            "row": n,
+            "name": name,
+            "subtitle": subtitle,
+            "price": price,
+            "discount_percent": discount,
+            "sub_category_id": sub_id,
+            "is_available": available,
+            "images": images,
+        })
+    return products, errors
+
+
+# =========================
+# IMAGES
+# =========================
+def _extract(archive: zipfile.ZipFile, names, folder):
+    stored, created = {}, []
+    for name in names:
+        with archive.open(name) as src:
+            path, is_new = store_file(src, folder, name)
+        stored[name] = path
+        if is_new:
+            created.append(path)
+    return stored, created
+
+
+async def store_images(archive: zipfile.ZipFile, products: list[dict], folder: str):
+    """Copy the referenced members into the store and render their
+    derivatives in parallel.
+
+    -> ({member: (path, derivatives)}, created paths, [row errors])
+    """
+    names = sorted({m for p in products for m in p["images"].values()})
+    if not names:
+        return {}, [], []
+
+    # unzipping is cheap I/O, done in order on one thread; the resizing
+    # fans out over the derivative process pool
+    stored, created = await run_in_threadpool(_extract, archive, names, folder)
+    paths = sorted(set(stored.values()))
+    rendered = dict(zip(paths, await asyncio.gather(
+        *(make_derivatives(path) for path in paths)
+    )))
+
+    images = {name: (stored[name], rendered[stored[name]]) for name in names}
+    errors = []
+    for p in products:
+        bad = [
+            f"{type_name}: {name} is not a readable image"
+            for type_name, name in p["images"].items()
+            if images[name][1] is None
+        ]
+        if bad:
+            errors.append({"row": p["row"], "errors": bad})
+    return images, created, errors
+
+
+# =========================
+# WRITE
+# =========================
+def write_import(db: Session, products: list[dict], images: dict) -> list[int]:
+    """Insert products and images in chunks; returns the new product ids.
+
+    Caller commits (or rolls back) the whole import at once.
+    """
+    high = db.scalar(select(func.coalesce(func.max(Product.id), 0)))
+
+    for chunk in chunks(products):
+        db.execute(insert(Product), [
+            {
+                "name": p["name"],
+                "subtitle": p["subtitle"],
+                "price": p["price"],
+                "discount_percent": p["discount_percent"],
+                "sub_category_id": p["sub_category_id"],
+                "is_available": p["is_available"],
+                "is_visible": False,
+            }
+            for p in chunk
+        ])
+
+    # executemany gives no per-row ids on MySQL; read them back by
+    # (sub, name), unique within the import. Rows other transactions add
+    # meanwhile stay invisible to this one under REPEATABLE READ
+    new = select(Product.id, Product.sub_category_id, Product.name)\
+        .where(Product.id > high)
+    ids = {}
+    for product_id, sub_id, name in db.execute(new):
+        if (sub_id, name) in ids:
+            raise HTTPException(409, "Catalog changed during import, retry")
+        ids[(sub_id, name)] = product_id
+    if len(ids) != len(products):
+        raise HTTPException(409, "Catalog changed during import, retry")
+    new_ids = [ids[(p["sub_category_id"], p["name"])] for p in products]
+
+    sync_product_visibility(db, Product.id > high)
+
+    image_rows = [
+        {
+            "product_id": product_id,
+            "type_name": type_name,
+            "image": images[name][0],
+            "derivatives": images[name][1],
+        }
+        for p, product_id in zip(products, new_ids)
+        for type_name, name in p["images"].items()
+    ]
+    for chunk in chunks(image_rows):
+        db.execute(insert(ProductImage), chunk)
+    acquire_many(db, [r["image"] for r in image_rows])
+
+    return new_ids
@@ -0,0 +1,540 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+
+from models.catalog import (
+    MainCategory,
+    SubCategory,
+    Product,
+    ProductImage,
+    CaseMainCategory,
+    CasePhone,
+    CaseModel,
+    CaseProduct,
+    CacheVersion,
+)
+from utils.pagination import encode_cursor, decode_sort_cursor
+from utils.derivatives import thumbnail_of
+
+# above this many visible products the snapshot skips products and the
+# listing routes page straight from the database instead
+MAX_PRODUCTS = int(os.getenv("CATALOG_CACHE_MAX_PRODUCTS", "50000"))
+
+# how often each worker reads the shared cache_versions counter to pick up
+# writes handled by other workers; 0 = single worker, counter never used
+VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "2"))
+SHARED_KEY = "catalog"
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# VISIBLE CATALOG QUERIES
+# =========================
+def visible_products_query(db: Session):
+    # ✅ products + their type1 (cover) image in one set-based query;
+    # is_visible already folds in the sub/main category flags
+    return db.query(Product, ProductImage.image, ProductImage.derivatives)\
+        .outerjoin(
+            ProductImage,
+            and_(
+                ProductImage.product_id == Product.id,
+                ProductImage.type_name == "type1"
+            )
+        )\
+        .filter(Product.is_visible == 1)
+
+
+def product_row(p: Product, image, derivatives=None):
+    return {
+        "id": p.id,
+        "name": p.name,
+        "subtitle": p.subtitle,
+        "price": p.price,
+        "discount_percent": p.discount_percent,
+        "sub_category_id": p.sub_category_id,
+        "image": image,
+        "thumbnail": thumbnail_of(derivatives)
+    }
+
+
+def type_images_for(db: Session, product_ids, visible_only: bool):
+    # ✅ type1..type5 images for many products in one query:
+    # {product_id: {type_name: image}}
+    query = db.query(Product.id, ProductImage.type_name, ProductImage.image)\
+        .outerjoin(ProductImage, ProductImage.product_id == Product.id)\
+        .filter(Product.id.in_(product_ids))
+    if visible_only:
+        query = query.filter(Product.is_visible == 1)
+
+    result = {}
+    for product_id, type_name, image in query.all():
+        images = result.setdefault(product_id, {})
+        if type_name:
+            images[type_name] = image
+    return result
+
+
+def row_dict(obj):
+    # same keys FastAPI emits when a route returns the ORM object itself
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+def case_tree_for(db: Session, active_only: bool):
+    # ✅ main -> phones -> models from one outer-joined query; with
+    # active_only a node shows only when it and all its parents are active
+    phone_on = CasePhone.case_main_category_id == CaseMainCategory.id
+    model_on = CaseModel.case_phone_id == CasePhone.id
+    query = db.query(CaseMainCategory, CasePhone, CaseModel)
+    if active_only:
+        query = query\
+            .outerjoin(CasePhone, and_(phone_on, CasePhone.is_active == 1))\
+            .outerjoin(CaseModel, and_(model_on, CaseModel.is_active == 1))\
+            .filter(CaseMainCategory.is_active == 1)
+    else:
+        query = query\
+            .outerjoin(CasePhone, phone_on)\
+            .outerjoin(CaseModel, model_on)
+
+    rows = query\
+        .order_by(CaseMainCategory.id, CasePhone.id, CaseModel.id)\
+        .all()
+
+    tree, mains, phones = [], {}, {}
+    for main, phone, model in rows:
+        node = mains.get(main.id)
+        if node is None:
+            node = mains[main.id] = {**row_dict(main), "phones": []}
+            tree.append(node)
+        if phone is None:
+            continue
+
+        phone_node = phones.get(phone.id)
+        if phone_node is None:
+            phone_node = phones[phone.id] = {**row_dict(phone), "models": []}
+            node["phones"].append(phone_node)
+        if model is not None:
+            phone_node["models"].append(row_dict(model))
+    return tree
+
+
+# =========================
+# SNAPSHOT
+# =========================
+# sort -> key over a product row; mirrors the ORDER BY in
+# user_catalog.page_products so cursors are interchangeable: NULL first
+# ascending and last descending (MySQL and SQLite), names compared
+# case-insensitively like MySQL's default collation
+SORT_KEYS = {
+    "newest": lambda r: (-r["id"],),
+    "price_asc": lambda r: (r["price"] is not None, r["price"] or 0, r["id"]),
+    "price_desc": lambda r: (r["price"] is None, -(r["price"] or 0), -r["id"]),
+    "name": lambda r: (r["name"] is not None, (r["name"] or "").casefold(), r["id"]),
+    "discount": lambda r: (
+        r["discount_percent"] is None, -(r["discount_percent"] or 0), -r["id"]
+    ),
+}
+CURSOR_FIELDS = {
+    "newest": ["id"],
+    "price_asc": ["price", "id"],
+    "price_desc": ["price", "id"],
+    "name": ["name", "id"],
+    "discount": ["discount_percent", "id"],
+}
+
+
+ETAG_SECTIONS = {
+    "categories": ["categories", "sub_categories"],
+    "products": ["products"],
+    "cases": ["case_main_categories", "case_phones", "case_models", "case_tree"],
+    "case_products": ["case_products"],
+}
+
+
+def _json_default(obj):
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    return str(obj)
+
+
+def _content_etag(parts) -> str:
+    digest = hashlib.sha1(
+        json.dumps(parts, sort_keys=True, default=_json_default).encode()
+    ).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+class CatalogSnapshot:
+    """Read-only copy of the visible catalog and case taxonomy.
+
+    Never mutated after build; a new version replaces it wholesale.
+    """
+
+    def __init__(self, version, data):
+        self.version = version
+        self.categories = data["categories"]
+        self.sub_categories = data["sub_categories"]
+        self.sub_main = data["sub_main"]
+        self.products = data["products"]
+        self.case_main_categories = data["case_main_categories"]
+        self.case_phones = data["case_phones"]
+        self.case_models = data["case_models"]
+        self.case_tree = data["case_tree"]
+        self.case_products = data["case_products"]
+        self.case_products_by_id = MappingProxyType(
+            {r["id"]: r for r in self.case_products}
+        )
+
+        # strong validators per section: same content -> same tag across
+        # restarts and workers, and a cases edit leaves catalog tags alone
+        self.etags = {
+            section: _content_etag([data[k] for k in keys])
+            for section, keys in ETAG_SECTIONS.items()
+        }
+
+        # (sort, sub_id | None) -> (keys, rows), sub_id None = whole catalog
+        self.orders = {}
+        if self.products is not None:
+            by_sub = {}
+            for r in self.products:
+                by_sub.setdefault(r["sub_category_id"], []).append(r)
+
+            for sort, key in SORT_KEYS.items():
+                for sub_id, rows in [(None, self.products), *by_sub.items()]:
+                    ordered = tuple(sorted(rows, key=key))
+                    self.orders[(sort, sub_id)] = (
+                        [key(r) for r in ordered],
+                        ordered
+                    )
+
+    def page_products(self, params: dict):
+        sort = params["sort"]
+        sub_id = params["sub_category_id"]
+        keys, rows = self.orders.get((sort, sub_id), ([], ()))
+
+        start = 0
+        if params["cursor"]:
+            fields = CURSOR_FIELDS[sort]
+            values = decode_sort_cursor(params["cursor"], sort)
+            last = dict(zip(fields, values))
+            start = bisect_right(keys, SORT_KEYS[sort](last))
+
+        main_id = params["main_category_id"]
+        min_price = params["min_price"]
+        max_price = params["max_price"]
+        limit = params["limit"]
+
+        items = []
+        for r in rows[start:] if start else rows:
+            if main_id is not None and self.sub_main.get(r["sub_category_id"]) != main_id:
+                continue
+            # NULL prices fail a price bound, as in SQL
+            if min_price is not None and (r["price"] is None or r["price"] < min_price):
+                continue
+            if max_price is not None and (r["price"] is None or r["price"] > max_price):
+                continue
+            if params["discounted"] and not (r["discount_percent"] or 0) > 0:
+                continue
+            items.append(r)
+            if len(items) > limit:
+                break
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(
+                [sort] + [items[-1][f] for f in CURSOR_FIELDS[sort]]
+            )
+
+        return {"items": list(items), "next_cursor": next_cursor}
+
+
+def build_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    mains = db.query(MainCategory)\
+        .filter(MainCategory.is_active == 1)\
+        .order_by(MainCategory.id)\
+        .all()
+
+    subs = db.query(SubCategory)\
+        .filter(SubCategory.is_visible == 1)\
+        .order_by(SubCategory.id)\
+        .all()
+
+    sub_categories = {}
+    for s in subs:
+        sub_categories.setdefault(s.main_category_id, []).append(row_dict(s))
+
+    rows = visible_products_query(db)\
+        .order_by(Product.id)\
+        .limit(MAX_PRODUCTS + 1)\
+        .all()
+    products = None
+    if len(rows) <= MAX_PRODUCTS:
+        products = tuple(product_row(*row) for row in rows)
+
+    phones = db.query(CasePhone)\
+        .filter(CasePhone.is_active == 1)\
+        .order_by(CasePhone.id)\
+        .all()
+    case_phones = {}
+    for p in phones:
+        case_phones.setdefault(p.case_main_category_id, []).append(row_dict(p))
+
+    models = db.query(CaseModel)\
+        .filter(CaseModel.is_active == 1)\
+        .order_by(CaseModel.id)\
+        .all()
+    case_models = {}
+    for m in models:
+        case_models.setdefault(m.case_phone_id, []).append(row_dict(m))
+
+    case_mains = db.query(CaseMainCategory)\
+        .filter(CaseMainCategory.is_active == 1)\
+        .order_by(CaseMainCategory.id)\
+        .all()
+
+    case_products = db.query(CaseProduct)\
+        .filter(CaseProduct.is_active == 1)\
+        .order_by(CaseProduct.id.desc())\
+        .all()
+
+    def freeze(groups):
+        return MappingProxyType({k: tuple(v) for k, v in groups.items()})
+
+    return CatalogSnapshot(version, {
+        "categories": tuple(row_dict(m) for m in mains),
+        "sub_categories": freeze(sub_categories),
+        "sub_main": MappingProxyType({s.id: s.main_category_id for s in subs}),
+        "products": products,
+        "case_main_categories": tuple(row_dict(c) for c in case_mains),
+        "case_phones": freeze(case_phones),
+        "case_models": freeze(case_models),
+        "case_tree": case_tree_for(db, active_only=True),
+        "case_products": tuple(row_dict(p) for p in case_products),
+    })
+
+
+# =========================
+# CACHE
+# =========================
+class CatalogCache:
+    """Holds the current snapshot; admin writes call invalidate().
+
+    One caller at a time rebuilds, in a worker thread on its own session;
+    meanwhile the others keep serving the previous snapshot (or, before
+    the first one exists, wait for the same build). invalidate() also bumps
+    the shared cache_versions counter, which every worker process polls,
+    so a write handled by one worker reaches the others' snapshots too.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self._version = 1
+        self._shared = None      # last cache_versions value seen
+        self._snapshot = None
+        self._building = None    # Future of the rebuild in flight
+        self._lock = threading.Lock()
+
+        # counter reads/writes, off the request path (one at a time)
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-version")
+        self._polling = False
+        self._last_poll = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.rebuilds = 0
+        self.remote_invalidations = 0
+        self.last_rebuild_ms = 0.0
+        self.total_rebuild_ms = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from database.db import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    # ---------- shared version ----------
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+        if VERSION_POLL_SECONDS > 0:
+            self._io.submit(self._bump_shared)
+
+    def _bump_shared(self):
+        db = self._session()
+        try:
+            bumped = db.execute(
+                update(CacheVersion)
+                .where(CacheVersion.name == SHARED_KEY)
+                .values(version=CacheVersion.version + 1)
+            ).rowcount
+            if not bumped:
+                db.add(CacheVersion(name=SHARED_KEY, version=1))
+            db.commit()
+            self._seen(self._read_shared(db), own_bump=True)
+        except Exception:
+            logger.exception("catalog cache: shared version bump failed")
+        finally:
+            db.close()
+
+    def _read_shared(self, db: Session):
+        return db.scalar(
+            select(CacheVersion.version).where(CacheVersion.name == SHARED_KEY)
+        )
+
+    def _poll_shared(self):
+        db = self._session()
+        try:
+            self._seen(self._read_shared(db))
+        except Exception:
+            logger.warning("catalog cache: shared version unreadable", exc_info=True)
+        finally:
+            db.close()
+            self._polling = False
+
+    def _seen(self, shared, own_bump=False):
+        # a counter move this worker did not make -> rebuild here too
+        if shared is None:
+            return
+        with self._lock:
+            expected = None if self._shared is None else self._shared + (1 if own_bump else 0)
+            if expected is not None and shared != expected:
+                self._version += 1
+                self.remote_invalidations += 1
+            self._shared = shared
+
+    def _maybe_poll(self):
+        if VERSION_POLL_SECONDS <= 0 or self._polling:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < VERSION_POLL_SECONDS:
+            return
+        self._last_poll = now
+        self._polling = True
+        self._io.submit(self._poll_shared)
+
+    def poll(self):
+        # for other per-process state following the same counter
+        # (utils/search_index); remote moves show in remote_invalidations
+        self._maybe_poll()
+
+    # ---------- snapshot ----------
+    def _fresh(self):
+        snap = self._snapshot
+        if snap is not None and snap.version == self._version:
+            self.hits += 1
+            return snap
+        return None
+
+    def _claim(self):
+        # -> (future, builds): builds is False when another caller is
+        # already rebuilding and this one should not
+        with self._lock:
+            self.misses += 1
+            if self._building is not None:
+                return self._building, False
+            self._building = Future()
+            return self._building, True
+
+    def _rebuild(self, future: Future) -> CatalogSnapshot:
+        # a write landing mid-build just leaves this snapshot stale
+        started = time.perf_counter()
+        try:
+            db = self._session()
+            try:
+                if VERSION_POLL_SECONDS > 0:
+                    # the counter as of this build: later moves rebuild
+                    try:
+                        self._seen(self._read_shared(db))
+                    except Exception:
+                        db.rollback()
+                version = self._version
+                snap = build_snapshot(db, version)
+            finally:
+                db.close()
+        except BaseException as e:
+            with self._lock:
+                self._building = None
+            future.set_exception(e)
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self.rebuilds += 1
+            self.last_rebuild_ms = elapsed
+            self.total_rebuild_ms += elapsed
+            current = self._snapshot
+            if current is None or current.version <= version:
+                self._snapshot = snap
+            self._building = None
+        future.set_result(snap)
+        return snap
+
+    def _stale(self):
+        snap = self._snapshot
+        if snap is not None:
+            self.stale_served += 1
+        return snap
+
+    def get(self) -> CatalogSnapshot:
+        self._maybe_poll()
+        snap = self._fresh()
+        if snap is not None:
+            return snap
+
+        future, builds = self._claim()
+        if builds:
+            return self._rebuild(future)
+        stale = self._stale()
+        return stale if stale is not None else future.result()
+
+    async def get_async(self) -> CatalogSnapshot:
+        # ✅ the rebuild (queries, ordering, ETag hashing) runs in a worker
+        # thread, so the event loop keeps serving while it works
+        self._maybe_poll()
+        snap = self._fresh()
+        if snap is not None:
+            return snap
+
+        future, builds = self._claim()
+        if builds:
+            return await asyncio.to_thread(self._rebuild, future)
+        stale = self._stale()
+        return stale if stale is not None else await asyncio.wrap_future(future)
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            "version": self._version,
+            "snapshot_version": snap.version if snap else None,
+            "products_cached": snap is not None and snap.products is not None,
+            "product_count": len(snap.products) if snap and snap.products is not None else None,
+            "max_products": MAX_PRODUCTS,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_served": self.stale_served,
+            "rebuilds": self.rebuilds,
+            "rebuilding": self._building is not None,
+            "remote_invalidations": self.remote_invalidations,
+            "version_poll_seconds": VERSION_POLL_SECONDS,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 3),
+            "total_rebuild_ms": round(self.total_rebuild_ms, 3),
+        }
+
+
+catalog_cache = CatalogCache()
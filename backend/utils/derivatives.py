@@ -0,0 +1,112 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+# rendition -> longest edge in px (aspect ratio kept, never upscaled)
+RENDITIONS = {
+    "thumb": 320,
+    "medium": 960,
+}
+
+# format -> (file extension, Pillow save options)
+FORMATS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_pool = None
+
+
+def derivative_path(path: str, rendition: str, fmt: str) -> str:
+    # static/products/<sha>.jpg -> static/products/<sha>.jpg.thumb.webp
+    # the extension stays in the name: <sha>.jpg and <sha>.png are separate
+    # blobs (separate refcounts), so they must not share renditions
+    return f"{path}.{rendition}.{FORMATS[fmt][0]}"
+
+
+def is_current(path: str, derivatives: dict | None) -> bool:
+    # stored renditions follow derivative_path (not an older naming)
+    return bool(derivatives) and all(
+        derivatives.get(rendition, {}).get(fmt) == derivative_path(path, rendition, fmt)
+        for rendition in RENDITIONS
+        for fmt in FORMATS
+    )
+
+
+def all_derivative_paths(path: str):
+    return [
+        derivative_path(path, rendition, fmt)
+        for rendition in RENDITIONS
+        for fmt in FORMATS
+    ]
+
+
+def render_derivatives(path: str) -> dict:
+    """Write every rendition/format of one image; runs in a worker process.
+
+    Returns {rendition: {format: path}}.
+    """
+    with Image.open(path) as src:
+        image = ImageOps.exif_transpose(src)
+        image.load()
+
+    # JPEG has no alpha: flatten transparent PNGs onto white
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+        image = flat
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    result = {}
+    for rendition, edge in RENDITIONS.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        result[rendition] = {}
+        for fmt, (_, options) in FORMATS.items():
+            out = derivative_path(path, rendition, fmt)
+            resized.save(out, **options)
+            result[rendition][fmt] = out
+    return result
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=WORKERS)
+    return _pool
+
+
+def existing_derivatives(path: str) -> dict | None:
+    result = {
+        rendition: {fmt: derivative_path(path, rendition, fmt) for fmt in FORMATS}
+        for rendition in RENDITIONS
+    }
+    for formats in result.values():
+        if not all(os.path.exists(p) for p in formats.values()):
+            return None
+    return result
+
+
+async def make_derivatives(path: str) -> dict | None:
+    # ✅ resizing is CPU-bound: a worker process does it while the event
+    # loop keeps serving; an unreadable upload just keeps its original.
+    # A deduplicated upload already has its renditions on disk.
+    existing = existing_derivatives(path)
+    if existing:
+        return existing
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_pool(), render_derivatives, path)
+    except Exception:
+        return None
+
+
+def thumbnail_of(derivatives: dict | None):
+    return (derivatives or {}).get("thumb")
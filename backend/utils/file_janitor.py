@@ -0,0 +1,159 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import delete, insert, select, update
+
+from models.catalog import MediaBlob
+from utils.uploads import delete_file
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.getenv("FILE_DELETE_BATCH", "200"))
+MAX_ATTEMPTS = int(os.getenv("FILE_DELETE_ATTEMPTS", "5"))
+RETRY_DELAY = float(os.getenv("FILE_DELETE_RETRY_DELAY", "2"))  # doubles per attempt
+
+
+class FileJanitor:
+    """Deletes released upload files on a background thread.
+
+    Paths arrive only after the transaction that released them has
+    committed. Each batch locks the media_blobs rows of its paths (adding
+    a ref_count 0 tombstone for paths without one) and deletes only files
+    still at zero, before committing; media_store.acquire() waits on the
+    same rows. Failed removals are retried with backoff.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self._queue = queue.Queue()
+        self._retry = []   # (not_before, attempts, path)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.deleted = 0
+        self.skipped = 0
+        self.retried = 0
+        self.failed = 0
+
+    def enqueue(self, paths):
+        for path in paths:
+            if path:
+                self._queue.put((0, path))
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="file-janitor", daemon=True
+                )
+                self._thread.start()
+
+    # ---------- worker ----------
+    def _next_batch(self):
+        timeout = None
+        if self._retry:
+            timeout = max(min(t for t, _, _ in self._retry) - time.monotonic(), 0)
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            batch = []
+
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        now = time.monotonic()
+        due = [(a, p) for t, a, p in self._retry if t <= now]
+        self._retry = [r for r in self._retry if r[0] > now]
+        return batch + due
+
+    def _collect(self, batch):
+        # -> (deleted, skipped, failed items); all inside one transaction
+        # that holds the blob rows of the batch
+        if self.session_factory is None:
+            from database.db import SessionLocal
+            self.session_factory = SessionLocal
+        paths = list(dict.fromkeys(p for _, p in batch))
+        db = self.session_factory()
+        try:
+            # no-op UPDATE: row locks on MySQL, the write lock on SQLite
+            db.execute(
+                update(MediaBlob)
+                .where(MediaBlob.path.in_(paths))
+                .values(ref_count=MediaBlob.ref_count)
+            )
+            counts = dict(db.execute(
+                select(MediaBlob.path, MediaBlob.ref_count)
+                .where(MediaBlob.path.in_(paths))
+            ).all())
+            tombstones = [p for p in paths if p not in counts]
+            if tombstones:
+                # files from before media_blobs: give a concurrent upload
+                # of the same bytes a row to wait on
+                db.execute(insert(MediaBlob), [
+                    {"path": p, "size": 0, "ref_count": 0} for p in tombstones
+                ])
+
+            deleted, failed = [], []
+            for attempts, path in batch:
+                if counts.get(path, 0) > 0 or path in deleted:
+                    continue
+                try:
+                    delete_file(path)
+                    deleted.append(path)
+                except OSError:
+                    failed.append((attempts + 1, path))
+
+            if deleted:
+                db.execute(delete(MediaBlob).where(MediaBlob.path.in_(deleted)))
+            db.commit()
+            return len(deleted), len(batch) - len(deleted) - len(failed), failed
+        finally:
+            db.close()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                deleted, skipped, failed = self._collect(batch)
+            except Exception:
+                # includes a tombstone insert racing an upload's acquire()
+                logger.exception("file janitor: batch failed")
+                self._requeue([(a + 1, p) for a, p in batch])
+                continue
+            self.deleted += deleted
+            self.skipped += skipped
+            self._requeue(failed)
+
+    def _requeue(self, items):
+        for attempts, path in items:
+            if attempts >= MAX_ATTEMPTS:
+                self.failed += 1
+                logger.error("file janitor: giving up on %s", path)
+                continue
+            self.retried += 1
+            delay = RETRY_DELAY * 2 ** (attempts - 1)
+            self._retry.append((time.monotonic() + delay, attempts, path))
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "retry_pending": len(self._retry),
+            "deleted": self.deleted,
+            "skipped_reused": self.skipped,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+janitor = FileJanitor()
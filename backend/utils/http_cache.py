@@ -0,0 +1,59 @@
+import os
+
+from fastapi import Request, Response
+
+# route -> (max-age, stale-while-revalidate) in seconds
+# override per route with env, e.g. CACHE_CATALOG_PRODUCTS="30,120"
+DEFAULT_POLICIES = {
+    "catalog_categories": (300, 3600),
+    "catalog_sub_categories": (300, 3600),
+    "catalog_products": (60, 300),
+    "cases_taxonomy": (300, 3600),
+    "cases_products": (60, 300),
+}
+
+
+def load_policies():
+    policies = {}
+    for route, default in DEFAULT_POLICIES.items():
+        raw = os.getenv(f"CACHE_{route.upper()}")
+        if raw:
+            max_age, swr = (int(v) for v in raw.split(","))
+            policies[route] = (max_age, swr)
+        else:
+            policies[route] = default
+    return policies
+
+
+POLICIES = load_policies()
+
+
+def cache_control(route: str) -> str:
+    max_age, swr = POLICIES[route]
+    return f"public, max-age={max_age}, stale-while-revalidate={swr}"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore a W/ prefix
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return etag in tags
+
+
+def conditional(request: Request, response: Response, route: str, etag: str | None):
+    """Set caching headers; return a bare 304 when the client is current.
+
+    Call before building the body so an unchanged resource costs nothing.
+    """
+    headers = {"Cache-Control": cache_control(route)}
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
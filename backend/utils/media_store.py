@@ -0,0 +1,145 @@
+import os
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.catalog import MediaBlob
+from utils.file_janitor import janitor
+
+# Uploads are stored once per content hash (see uploads.save_image), so
+# several rows can point at the same file. media_blobs counts those
+# references: writes acquire() the path they store and release() the
+# paths they drop, in the same transaction. Paths whose count reached
+# zero are handed to the background janitor once that transaction
+# commits; a rollback forgets them and the files stay.
+#
+# A row at zero stays as a tombstone until the janitor removes it together
+# with the file. Both sides serialize on that row: the janitor locks it
+# before deleting, and acquire() (which locks it too) then checks the file
+# is still on disk, so a commit never points at a file the janitor took.
+#
+# Files uploaded before this existed have no blob row; each belongs to
+# exactly one row, so releasing one frees it straight away.
+
+
+def acquire(db: Session, path: str):
+    if not path:
+        return
+    bump = update(MediaBlob)\
+        .where(MediaBlob.path == path)\
+        .values(ref_count=MediaBlob.ref_count + 1)
+    if not db.execute(bump).rowcount:
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        try:
+            with db.begin_nested():
+                db.add(MediaBlob(path=path, size=size, ref_count=1))
+        except IntegrityError:
+            # a concurrent upload of the same bytes created it first
+            db.execute(bump)
+    ensure_present([path])
+
+
+def ensure_present(paths):
+    # called with the blob rows locked: the janitor cannot start on them
+    # now, but it may have deleted the file after the upload wrote it
+    if any(not os.path.exists(p) for p in paths):
+        raise HTTPException(409, "Upload collided with a file cleanup, please retry")
+
+
+def acquire_many(db: Session, paths):
+    """acquire() for a batch: one reference per occurrence in paths,
+    with a fixed number of statements instead of one or two per path."""
+    counts = Counter(p for p in paths if p)
+    if not counts:
+        return
+
+    tracked = set(db.scalars(
+        select(MediaBlob.path).where(MediaBlob.path.in_(counts))
+    ))
+    by_count = {}
+    for path in tracked:
+        by_count.setdefault(counts[path], []).append(path)
+    for n, group in by_count.items():
+        db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.path.in_(group))
+            .values(ref_count=MediaBlob.ref_count + n)
+        )
+
+    new = [
+        {
+            "path": p,
+            "size": os.path.getsize(p) if os.path.exists(p) else 0,
+            "ref_count": counts[p],
+        }
+        for p in counts if p not in tracked
+    ]
+    if new:
+        try:
+            with db.begin_nested():
+                db.execute(insert(MediaBlob), new)
+        except IntegrityError:
+            # a concurrent upload created some of them first
+            for row in new:
+                for _ in range(row["ref_count"]):
+                    acquire(db, row["path"])
+    ensure_present(counts)
+
+
+def release(db: Session, *paths) -> list[str]:
+    """Drop one reference per path; files nothing uses any more are
+    deleted after the commit. Returns those paths."""
+    counts = Counter(p for p in paths if p)
+    if not counts:
+        return []
+
+    tracked = set(db.scalars(
+        select(MediaBlob.path).where(MediaBlob.path.in_(counts))
+    ))
+
+    # one UPDATE per distinct count (almost always just "- 1")
+    by_count = {}
+    for path in tracked:
+        by_count.setdefault(counts[path], []).append(path)
+    for n, group in by_count.items():
+        db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.path.in_(group))
+            .values(ref_count=MediaBlob.ref_count - n)
+        )
+
+    unused = [p for p in counts if p not in tracked]
+    if tracked:
+        # rows at zero stay (tombstones) until the janitor deletes the file
+        unused += db.scalars(
+            select(MediaBlob.path).where(
+                MediaBlob.path.in_(tracked),
+                MediaBlob.ref_count <= 0
+            )
+        )
+
+    db.info.setdefault(PENDING_KEY, []).extend(unused)
+    return unused
+
+
+# =========================
+# AFTER COMMIT
+# =========================
+PENDING_KEY = "released_files"
+
+
+@event.listens_for(Session, "after_commit")
+def _delete_released(session):
+    paths = session.info.pop(PENDING_KEY, None)
+    if paths:
+        janitor.enqueue(paths)
+
+
+@event.listens_for(Session, "after_rollback")
+def _keep_released(session):
+    # a savepoint rollback (see acquire) leaves the outer transaction live
+    if not session.in_transaction():
+        session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+
+
+# cursors are opaque to the client: base64 of the last row's sort key + id
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, binascii.Error):
+        raise HTTPException(400, "Invalid cursor")
+
+    if not isinstance(values, list):
+        raise HTTPException(400, "Invalid cursor")
+    return values
+
+
+# sort -> type of each sort key in its cursor (the trailing id is an int);
+# a key of the wrong type would fail the comparisons in the snapshot paging
+CURSOR_KEY_TYPES = {
+    "newest": (),
+    "price_asc": (int,),
+    "price_desc": (int,),
+    "name": (str,),
+    "discount": (int,),
+}
+
+
+def is_type(value, expected: type) -> bool:
+    # JSON true/false decode to bool, a subclass of int
+    return isinstance(value, expected) and not isinstance(value, bool)
+
+
+def decode_sort_cursor(cursor: str, sort: str) -> list:
+    # [sort, key.., id]: sort keys may be null (nullable columns), the id not
+    values = decode_cursor(cursor)
+    types = CURSOR_KEY_TYPES.get(sort)
+    if types is None or len(values) != len(types) + 2 or values[0] != sort \
+            or not is_type(values[-1], int) \
+            or not all(v is None or is_type(v, t) for v, t in zip(values[1:-1], types)):
+        raise HTTPException(400, "Invalid cursor")
+    return values[1:]
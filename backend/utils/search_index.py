@@ -0,0 +1,541 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from models.catalog import Product, ProductImage, CaseProduct, CaseVariant
+from utils.catalog_snapshot import catalog_cache
+from utils.derivatives import thumbnail_of
+
+# field weights: a hit in the name/title outranks one in the subtitle
+NAME_WEIGHT = 2.0
+SUBTITLE_WEIGHT = 1.0
+
+# the last query token also matches longer terms ("cha" -> "charg", ..)
+PREFIX_MIN_LEN = 2
+PREFIX_MAX_TERMS = 20
+
+STOPWORDS = {
+    "a", "an", "and", "the", "or", "of", "for", "with", "in", "on", "to", "by",
+}
+
+# \w misses the combining vowel signs of Indic scripts (Tamil etc.),
+# which would split a word into single letters
+TOKEN_RE = re.compile(r"[\w\u0900-\u0dff]+")
+
+# below this many matches scoring them all beats the threshold walk
+DIRECT_SCORE_MAX = 5000
+
+# rankings kept for repeated queries (popular terms are the costly ones)
+RESULT_CACHE_SIZE = 1024
+
+# docs applied per lock hold during a full (re)build
+APPLY_CHUNK = 1000
+
+# documents are keyed by int (cheap to hash in the set intersections):
+# product id -> 2 * id, case product id -> 2 * id + 1
+KINDS = {"product": 0, "case": 1}
+
+logger = logging.getLogger(__name__)
+
+
+def doc_key(kind: str, id: int) -> int:
+    return 2 * id + KINDS[kind]
+
+
+# =========================
+# TEXT NORMALIZATION
+# =========================
+def normalize(token: str) -> str:
+    # fold accents on latin text ("café" -> "cafe") but keep scripts whose
+    # vowel signs are combining marks (e.g. Tamil) intact
+    folded = "".join(
+        ch for ch in unicodedata.normalize("NFKD", token)
+        if not unicodedata.combining(ch)
+    )
+    return folded if folded.isascii() else token
+
+
+def stem(word: str) -> str:
+    """Light suffix stripper: plurals, -ing/-ed/-ly and a final -e."""
+    if len(word) <= 3 or not word.isascii() or word.isdigit():
+        return word
+
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith(("ches", "shes", "xes", "zes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+
+    for suffix in ("ingly", "edly", "ing", "ed", "ly"):
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and re.search(r"[aeiouy]", base):
+            word = base
+            # "stopped" -> "stopp" -> "stop"
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]
+            break
+
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [
+        stem(normalize(t))
+        for t in TOKEN_RE.findall(text.casefold())
+        if t not in STOPWORDS
+    ]
+
+
+# =========================
+# INDEX
+# =========================
+class SearchIndex:
+    """Inverted index over products and case products.
+
+    Built lazily on the first search, then kept current by the admin
+    write endpoints through index_products/index_cases/remove. Rows are
+    read from the database outside the lock; the lock only guards the
+    dict updates, so searches never wait on a query. Writes handled by
+    other worker processes arrive through refresh().
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built = False
+        self._building = False
+        self._ticket = 0
+        self._stamps = {}     # doc key -> ticket of the read that last set it
+
+        # full re-reads after other workers' writes (one at a time)
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-reindex")
+        self._synced = 0      # catalog_cache.remote_invalidations as of the last read
+        self._refreshing = False
+        self.reindexes = 0
+
+        self.docs = {}        # doc key -> public row
+        self.hidden = set()   # keys indexed but not publicly visible
+        self.doc_terms = {}   # doc key -> set of terms (for removal)
+        self.postings = {}    # term -> {doc key: weight}
+        self.terms = []       # sorted vocabulary, for prefix lookups
+        self._ranked = {}     # term -> [(weight, key)] desc, rebuilt lazily
+        self._results = OrderedDict()  # recent rankings, dropped on any write
+
+    # ---------- maintenance ----------
+    def _remove(self, key):
+        for term in self.doc_terms.pop(key, ()):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            self._ranked.pop(term, None)
+            if not posting:
+                del self.postings[term]
+                i = bisect_left(self.terms, term)
+                if i < len(self.terms) and self.terms[i] == term:
+                    self.terms.pop(i)
+        self.docs.pop(key, None)
+        self.hidden.discard(key)
+
+    def _add(self, key, row, title, subtitle, visible):
+        self._remove(key)
+
+        tf = {}
+        for t in tokenize(title):
+            tf[t] = tf.get(t, 0) + NAME_WEIGHT
+        for t in tokenize(subtitle):
+            tf[t] = tf.get(t, 0) + SUBTITLE_WEIGHT
+
+        # log tf with length normalization; independent of corpus stats
+        # so a single upsert never forces a global re-score
+        norm = 1 / math.sqrt(max(len(tf), 1))
+        for term, f in tf.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                i = bisect_left(self.terms, term)
+                self.terms.insert(i, term)
+            posting[key] = (1 + math.log(f)) * norm
+            self._ranked.pop(term, None)
+
+        self.doc_terms[key] = set(tf)
+        self.docs[key] = row
+        if not visible:
+            self.hidden.add(key)
+
+    def _take_ticket(self):
+        with self._lock:
+            self._ticket += 1
+            return self._ticket
+
+    def _apply(self, ticket, docs, removed=()):
+        # only the dict mutations run under the lock, never a query. A doc
+        # already set by a read that started later (higher ticket) is kept,
+        # so an older read finishing last cannot bring back stale rows
+        with self._lock:
+            for doc in docs:
+                key, row, _, _, visible = doc
+                if self._stamps.get(key, 0) > ticket:
+                    continue
+                self._stamps[key] = ticket
+                if self.docs.get(key) == row and (key in self.hidden) != bool(visible):
+                    continue
+                self._add(*doc)
+            for key in removed:
+                if self._stamps.get(key, 0) > ticket:
+                    continue
+                self._stamps[key] = ticket
+                self._remove(key)
+            self._results.clear()
+
+    def _product_docs(self, db: Session, *criteria):
+        rows = db.query(Product, ProductImage.image, ProductImage.derivatives)\
+            .outerjoin(
+                ProductImage,
+                and_(
+                    ProductImage.product_id == Product.id,
+                    ProductImage.type_name == "type1"
+                )
+            )\
+            .filter(*criteria)\
+            .all()
+
+        return [
+            (
+                doc_key("product", p.id),
+                {
+                    "type": "product",
+                    "id": p.id,
+                    "name": p.name,
+                    "subtitle": p.subtitle,
+                    "price": p.price,
+                    "discount_percent": p.discount_percent,
+                    "sub_category_id": p.sub_category_id,
+                    "image": image,
+                    "thumbnail": thumbnail_of(derivatives)
+                },
+                p.name,
+                p.subtitle,
+                p.is_visible
+            )
+            for p, image, derivatives in rows
+        ]
+
+    def _case_docs(self, db: Session, *criteria):
+        rows = db.query(CaseProduct, CaseVariant.image, CaseVariant.derivatives)\
+            .outerjoin(
+                CaseVariant,
+                and_(
+                    CaseVariant.case_product_id == CaseProduct.id,
+                    CaseVariant.type_name == "type1",
+                    CaseVariant.is_active == 1
+                )
+            )\
+            .filter(*criteria)\
+            .all()
+
+        return [
+            (
+                doc_key("case", c.id),
+                {
+                    "type": "case",
+                    "id": c.id,
+                    "name": c.title,
+                    "subtitle": c.subtitle,
+                    "price": c.price,
+                    "discount_percent": c.discount_percent,
+                    "image": image,
+                    "thumbnail": thumbnail_of(derivatives)
+                },
+                c.title,
+                c.subtitle,
+                c.is_active == 1
+            )
+            for c, image, derivatives in rows
+        ]
+
+    def _session(self) -> Session:
+        if self.session_factory is None:
+            from database.db import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    @property
+    def built(self):
+        return self._built
+
+    def _load_all(self, docs_removed):
+        # full read on its own session; applied in chunks so searches and
+        # admin writes only ever wait for one chunk
+        ticket = self._take_ticket()
+        db = self._session()
+        try:
+            docs = self._product_docs(db) + self._case_docs(db)
+        finally:
+            db.close()
+
+        for i in range(0, len(docs), APPLY_CHUNK):
+            self._apply(ticket, docs[i:i + APPLY_CHUNK])
+        if docs_removed:
+            seen = {doc[0] for doc in docs}
+            self._apply(ticket, [], [key for key in list(self.docs) if key not in seen])
+
+    def ensure_built(self):
+        """Build the index on its own session; blocking, so async callers
+        run it in a worker thread. Concurrent callers wait for one build."""
+        if self._built:
+            return
+        with self._build_lock:
+            if self._built:
+                return
+            # admin writes landing from here on are applied as they come
+            self._building = True
+            self._synced = catalog_cache.remote_invalidations
+            try:
+                self._load_all(docs_removed=False)
+                self._built = True
+            finally:
+                self._building = False
+
+    def refresh(self):
+        """Re-read everything in the background once another worker has
+        moved the shared catalog counter (utils/catalog_snapshot): writes
+        it handled never reached this process's index."""
+        catalog_cache.poll()
+        if not self._built or self._refreshing:
+            return
+        if catalog_cache.remote_invalidations == self._synced:
+            return
+        self._refreshing = True
+        self._io.submit(self._reindex)
+
+    def _reindex(self):
+        try:
+            with self._build_lock:
+                self._synced = catalog_cache.remote_invalidations
+                self._load_all(docs_removed=True)
+                self.reindexes += 1
+        except Exception:
+            logger.exception("search index: reindex failed")
+        finally:
+            self._refreshing = False
+
+    def _write_ticket(self):
+        # None before the first build starts: it reads the committed rows
+        if self._built or self._building:
+            return self._take_ticket()
+        return None
+
+    # The writers below may run on the event loop through run_sync, where
+    # the query suspends the caller: no lock is held while it runs.
+    def index_products(self, db: Session, *criteria):
+        # re-read the matching rows and re-index them (flags, text, cover)
+        ticket = self._write_ticket()
+        if ticket is not None:
+            self._apply(ticket, self._product_docs(db, *criteria))
+
+    def index_cases(self, db: Session, *criteria):
+        ticket = self._write_ticket()
+        if ticket is not None:
+            self._apply(ticket, self._case_docs(db, *criteria))
+
+    def remove(self, kind: str, ids):
+        ticket = self._write_ticket()
+        if ticket is not None:
+            self._apply(ticket, [], [doc_key(kind, id) for id in ids])
+
+    # ---------- querying ----------
+    def _ranked_posting(self, term):
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = sorted(
+                ((w, key) for key, w in self.postings[term].items()),
+                reverse=True
+            )
+            self._ranked[term] = ranked
+        return ranked
+
+    def _expand(self, token, is_last):
+        if not (is_last and len(token) >= PREFIX_MIN_LEN):
+            return [token] if token in self.postings else []
+
+        start = bisect_left(self.terms, token)
+        matches = []
+        for term in self.terms[start:start + PREFIX_MAX_TERMS]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, q: str, offset: int = 0, limit: int = 20):
+        tokens = tuple(dict.fromkeys(tokenize(q)))
+        if not tokens:
+            return {"items": [], "total": 0}
+
+        key = (tokens, offset + limit)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is None:
+                cached = self._results[key] = self._rank(tokens, offset + limit)
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(key)
+            ranked, total = cached
+            return self._page(ranked, total, offset)
+
+    def _rank(self, tokens, wanted):
+        """Top `wanted` (score, key) pairs and the match count."""
+        n_docs = max(len(self.docs), 1)
+
+        # every query token must match (through any of its expansions)
+        groups = []
+        for i, token in enumerate(tokens):
+            terms = self._expand(token, i == len(tokens) - 1)
+            if not terms:
+                return [], 0
+            groups.append(terms)
+
+        idf = {
+            term: math.log(1 + n_docs / len(self.postings[term]))
+            for terms in groups for term in terms
+        }
+
+        # single term: walk its impact-ordered posting, no scoring pass
+        if len(groups) == 1 and len(groups[0]) == 1:
+            term = groups[0][0]
+            posting = self.postings[term]
+            total = len(posting) - len(posting.keys() & self.hidden)
+
+            ranked = []
+            for w, key in self._ranked_posting(term):
+                if len(ranked) == wanted:
+                    break
+                if key not in self.hidden:
+                    ranked.append((w * idf[term], key))
+            return ranked, total
+
+        # conjunctive match with C-level set ops, rarest group first
+        group_keys = []
+        for terms in groups:
+            if len(terms) == 1:
+                group_keys.append(self.postings[terms[0]].keys())
+            else:
+                group_keys.append(
+                    set().union(*(self.postings[t].keys() for t in terms))
+                )
+        group_keys.sort(key=len)
+
+        if len(group_keys) == 1:
+            matched = set(group_keys[0])
+        else:
+            matched = group_keys[0] & group_keys[1]
+            for keys in group_keys[2:]:
+                matched &= keys
+        matched -= self.hidden
+
+        if len(matched) <= DIRECT_SCORE_MAX:
+            top = self._score_all(groups, idf, matched, wanted)
+        else:
+            top = self._top_k(groups, idf, matched, wanted)
+        return top, len(matched)
+
+    def _term_stream(self, term, weight):
+        for w, key in self._ranked_posting(term):
+            yield w * weight, key
+
+    def _group_stream(self, terms, idf):
+        # (score, key) in descending score order across a group's terms
+        streams = [self._term_stream(t, idf[t]) for t in terms]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, reverse=True)
+
+    def _group_score(self, terms, idf, key):
+        # within a prefix group the best expansion counts
+        return max(self.postings[t].get(key, 0.0) * idf[t] for t in terms)
+
+    def _score_all(self, groups, idf, matched, k):
+        scores = dict.fromkeys(matched, 0.0)
+        for terms in groups:
+            if len(terms) == 1:
+                posting = self.postings[terms[0]]
+                weight = idf[terms[0]]
+                for key in matched:
+                    scores[key] += posting[key] * weight
+                continue
+
+            best = {}
+            for term in terms:
+                posting = self.postings[term]
+                weight = idf[term]
+                for key in matched & posting.keys():
+                    s = posting[key] * weight
+                    if s > best.get(key, 0.0):
+                        best[key] = s
+            for key, s in best.items():
+                scores[key] += s
+
+        return heapq.nlargest(k, ((s, key) for key, s in scores.items()))
+
+    def _top_k(self, groups, idf, matched, k):
+        """Threshold algorithm: walk each group's impact-ordered stream,
+        fully score every new match, and stop once no unseen document
+        can beat the current k-th score."""
+        if not matched or k <= 0:
+            return []
+
+        streams = [self._group_stream(terms, idf) for terms in groups]
+        frontier = [math.inf] * len(streams)
+        heap, seen = [], set()
+
+        while True:
+            for i, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    # every doc of this group (so every match) was seen
+                    return sorted(heap, reverse=True)
+
+                score, key = item
+                frontier[i] = score
+                if key in seen or key not in matched:
+                    continue
+                seen.add(key)
+
+                total = sum(
+                    self._group_score(terms, idf, key) for terms in groups
+                )
+                if len(heap) < k:
+                    heapq.heappush(heap, (total, key))
+                elif total > heap[0][0]:
+                    heapq.heapreplace(heap, (total, key))
+
+            if len(heap) == k and heap[0][0] >= sum(frontier):
+                return sorted(heap, reverse=True)
+
+    def _page(self, ranked, total, offset):
+        items = [
+            {**self.docs[key], "score": round(score, 4)}
+            for score, key in ranked[offset:]
+        ]
+        return {"items": items, "total": total}
+
+
+search_index = SearchIndex()
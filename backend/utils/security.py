@@ -1,3 +1,9 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
@@ -9,7 +15,19 @@ ALGORITHM = "HS256"
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost; hashes made with another cost are upgraded on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# worker processes for bcrypt, and how many callers may wait for one
+# before new logins are turned away with a 503
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -17,8 +35,91 @@ def hash_password(password: str):
 def verify_password(password, hashed):
     return pwd_context.verify(password, hashed)
 
+def verify_and_update(password, hashed):
+    # -> (ok, new hash or None when the stored one is current)
+    return pwd_context.verify_and_update(password, hashed)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+# =========================
+# OFF-LOOP HASHING
+# =========================
+class PasswordHasher:
+    """Runs bcrypt in worker processes, never on the request threads.
+
+    At most `workers` jobs run at once; the rest wait here (counted as
+    queue depth) and past `max_queue` waiters new requests get a 503.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._slots = None
+
+        self.running = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run(self, fn, *args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(503, "Too many sign-in attempts, try again shortly")
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.get_pool(), fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.total_ms += (time.perf_counter() - started) * 1000
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password, hashed) -> bool:
+        return await self._run(verify_password, password, hashed)
+
+    async def verify_and_update(self, password, hashed):
+        return await self._run(verify_and_update, password, hashed)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "rounds": BCRYPT_ROUNDS,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "peak_queue_depth": self.peak_waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.completed, 3) if self.completed else None,
+        }
+
+
+password_hasher = PasswordHasher(HASH_WORKERS, HASH_MAX_QUEUE)
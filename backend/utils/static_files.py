@@ -0,0 +1,107 @@
+import mimetypes
+import os
+import re
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# uploads are never rewritten in place: content-addressed (<sha256>..) or,
+# for files stored before that, uuid-prefixed -- a new image is a new URL
+UNIQUE_NAME_RE = re.compile(
+    r"^(?:[0-9a-f]{64}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}_)"
+)
+
+IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+# anything else may change under the same name: always revalidate
+DEFAULT_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, no-cache")
+
+# preferred first; a sibling "<file>.br" / "<file>.gz" is served as-is
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSIBLE_TYPES = {
+    "image/svg+xml",
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "application/xml",
+}
+
+
+def cache_control_for(path: str) -> str:
+    if UNIQUE_NAME_RE.match(os.path.basename(path)):
+        return IMMUTABLE_CACHE_CONTROL
+    return DEFAULT_CACHE_CONTROL
+
+
+def is_compressible(media_type: str | None) -> bool:
+    return bool(media_type) and (
+        media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+    )
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with long-lived caching for uploads and precompressed
+    delivery.
+
+    ETag/Last-Modified, conditional GETs and Range requests come from
+    Starlette's FileResponse; this adds Cache-Control and picks a .br/.gz
+    sibling when the client accepts it.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = str(full_path)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        headers = {"Cache-Control": cache_control_for(path)}
+
+        serve_path, serve_stat = path, stat_result
+        if is_compressible(media_type):
+            headers["Vary"] = "Accept-Encoding"
+            # ranges address the identity bytes, so never swap for those
+            if "range" not in request_headers:
+                accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+                for coding, suffix in PRECOMPRESSED:
+                    if coding not in accepted:
+                        continue
+                    try:
+                        serve_stat = os.stat(path + suffix)
+                    except OSError:
+                        continue
+                    serve_path = path + suffix
+                    headers["Content-Encoding"] = coding
+                    break
+
+        response = FileResponse(
+            serve_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=serve_stat,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
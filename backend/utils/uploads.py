@@ -0,0 +1,82 @@
+import hashlib
+import os
+import uuid
+
+import anyio
+from fastapi import UploadFile
+
+from utils.derivatives import all_derivative_paths
+
+# read/write in 1 MiB pieces so a large upload never sits in memory whole
+CHUNK_SIZE = 1024 * 1024
+
+
+# normalize so "a.JPEG" and "b.jpg" with the same bytes share one file
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff"}
+
+
+def extension_of(filename: str | None) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    ext = EXTENSION_ALIASES.get(ext, ext)
+    if len(ext) > 6 or not ext[1:].isalnum():
+        return ""
+    return ext
+
+
+async def save_image(image: UploadFile, folder: str) -> str:
+    # ✅ streamed copy: each chunk is awaited, so no worker thread is held
+    # for the whole file the way shutil.copyfileobj was.
+    # Hashed on the way in and stored as <sha256><ext>: the same bytes
+    # uploaded twice land on one file (refcounted by utils/media_store)
+    digest = hashlib.sha256()
+    tmp = os.path.join(folder, f".upload-{uuid.uuid4().hex}")
+    try:
+        async with await anyio.open_file(tmp, "wb") as buffer:
+            while chunk := await image.read(CHUNK_SIZE):
+                digest.update(chunk)
+                await buffer.write(chunk)
+
+        # always replaced, never "already there, drop the copy": the
+        # janitor may be deleting a released file with the same bytes, and
+        # media_store.acquire() checks the file is still present once it
+        # holds the blob row
+        path = os.path.join(folder, digest.hexdigest() + extension_of(image.filename))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
+
+
+def store_file(src, folder: str, filename: str) -> tuple[str, bool]:
+    """Blocking twin of save_image for a file object (e.g. a zip member).
+
+    Returns (path, created); created is False when the bytes were
+    already stored.
+    """
+    digest = hashlib.sha256()
+    tmp = os.path.join(folder, f".upload-{uuid.uuid4().hex}")
+    try:
+        with open(tmp, "wb") as buffer:
+            while chunk := src.read(CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        path = os.path.join(folder, digest.hexdigest() + extension_of(filename))
+        created = not os.path.exists(path)
+        os.replace(tmp, path)   # see save_image
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path, created
+
+
+def delete_file(path: str):
+    # the original plus its thumb/medium renditions, when present
+    if not path:
+        return
+    for p in [path, *all_derivative_paths(path)]:
+        if os.path.exists(p):
+            os.remove(p)
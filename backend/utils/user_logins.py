@@ -0,0 +1,74 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from models.catalog import User, UserLogin
+
+# Users sign in with their email or their name; both are stored in
+# user_logins in one normalized form, keyed by (kind, identifier) so a
+# name can never take an email's key. Input with an "@" is an email,
+# anything else a name (names may not contain "@"). A name that is
+# already taken stays with the first user that had it.
+
+EMAIL = "email"
+NAME = "name"
+
+
+def login_key(value: str | None) -> str:
+    return (value or "").strip().casefold()
+
+
+def login_kind(value: str | None) -> str:
+    return EMAIL if "@" in (value or "") else NAME
+
+
+def login_keys(user: User) -> list[tuple[str, str]]:
+    keys = [(EMAIL, login_key(user.email)), (NAME, login_key(user.name))]
+    return [(kind, key) for kind, key in keys if key]
+
+
+def insert_ignore(db: Session):
+    # INSERT that skips rows whose (kind, identifier) is taken; a
+    # concurrent insert of the same key waits for the other transaction
+    if db.get_bind().dialect.name == "mysql":
+        return mysql.insert(UserLogin).prefix_with("IGNORE")
+    return sqlite.insert(UserLogin).on_conflict_do_nothing()
+
+
+def add_logins(db: Session, users) -> int:
+    """Insert the identifiers of users that are still free; returns the
+    number added. Earlier users in the list win a shared identifier."""
+    wanted = {}
+    for user in users:
+        for key in login_keys(user):
+            wanted.setdefault(key, user.id)
+    if not wanted:
+        return 0
+
+    rows = [
+        {"kind": kind, "identifier": key, "user_id": user_id}
+        for (kind, key), user_id in wanted.items()
+    ]
+    return db.execute(insert_ignore(db).values(rows)).rowcount
+
+
+def taken_logins(db: Session, user: User) -> list[str]:
+    # kinds of the user's identifiers that belong to someone else
+    keys = login_keys(user)
+    owners = db.execute(
+        select(UserLogin.kind, UserLogin.identifier, UserLogin.user_id)
+        .where(UserLogin.identifier.in_([key for _, key in keys]))
+    ).all()
+    return [
+        kind for kind, key, user_id in owners
+        if (kind, key) in keys and user_id != user.id
+    ]
+
+
+def email_taken(db: Session, email: str) -> bool:
+    return db.scalar(
+        select(UserLogin.user_id).where(
+            UserLogin.kind == EMAIL,
+            UserLogin.identifier == login_key(email)
+        )
+    ) is not None
@@ -0,0 +1,114 @@
+from sqlalchemy import and_, case, select
+from sqlalchemy.orm import Session
+
+from models.catalog import MainCategory, SubCategory, Product
+
+# Effective visibility is denormalized onto sub categories and products so
+# public reads filter one indexed column instead of joining the hierarchy.
+# Every write that changes a flag or a parent calls these in the same
+# transaction, one UPDATE per level.
+
+
+def sync_sub_visibility(db: Session, *criteria):
+    main_active = select(MainCategory.is_active)\
+        .where(MainCategory.id == SubCategory.main_category_id)\
+        .scalar_subquery()
+
+    db.query(SubCategory).filter(*criteria).update(
+        {
+            SubCategory.is_visible: case(
+                (and_(SubCategory.is_active == 1, main_active == 1), True),
+                else_=False
+            )
+        },
+        synchronize_session=False
+    )
+
+
+def sync_product_visibility(db: Session, *criteria):
+    sub_visible = select(SubCategory.is_visible)\
+        .where(SubCategory.id == Product.sub_category_id)\
+        .scalar_subquery()
+
+    db.query(Product).filter(*criteria).update(
+        {
+            Product.is_visible: case(
+                (and_(Product.is_available == 1, sub_visible == 1), True),
+                else_=False
+            )
+        },
+        synchronize_session=False
+    )
+
+
+def sync_main_category(db: Session, main_id: int):
+    sync_sub_visibility(db, SubCategory.main_category_id == main_id)
+    sync_product_visibility(
+        db,
+        Product.sub_category_id.in_(
+            select(SubCategory.id).where(SubCategory.main_category_id == main_id)
+        )
+    )
+
+
+def sync_sub_category(db: Session, sub_id: int):
+    sync_sub_visibility(db, SubCategory.id == sub_id)
+    sync_product_visibility(db, Product.sub_category_id == sub_id)
+
+
+def sync_all(db: Session):
+    # full backfill, e.g. after adding the columns to an existing database
+    sync_sub_visibility(db)
+    sync_product_visibility(db)
+
+
+# =========================
+# BULK TOGGLES
+# =========================
+# Flag + denormalized visibility for many rows at once. Products and sub
+# categories set both columns in the same UPDATE; returns rows matched.
+def set_products_available(db: Session, ids, available: bool) -> int:
+    sub_visible = select(SubCategory.is_visible)\
+        .where(SubCategory.id == Product.sub_category_id)\
+        .scalar_subquery()
+
+    return db.query(Product).filter(Product.id.in_(ids)).update(
+        {
+            Product.is_available: available,
+            Product.is_visible: case((sub_visible == 1, True), else_=False)
+            if available else False
+        },
+        synchronize_session=False
+    )
+
+
+def set_subs_active(db: Session, ids, active: bool) -> int:
+    main_active = select(MainCategory.is_active)\
+        .where(MainCategory.id == SubCategory.main_category_id)\
+        .scalar_subquery()
+
+    count = db.query(SubCategory).filter(SubCategory.id.in_(ids)).update(
+        {
+            SubCategory.is_active: active,
+            SubCategory.is_visible: case((main_active == 1, True), else_=False)
+            if active else False
+        },
+        synchronize_session=False
+    )
+    sync_product_visibility(db, Product.sub_category_id.in_(ids))
+    return count
+
+
+def set_mains_active(db: Session, ids, active: bool) -> int:
+    count = db.query(MainCategory).filter(MainCategory.id.in_(ids)).update(
+        {MainCategory.is_active: active},
+        synchronize_session=False
+    )
+    sync_sub_visibility(db, SubCategory.main_category_id.in_(ids))
+    sync_product_visibility(
+        db,
+        Product.sub_category_id.in_(
+            select(SubCategory.id).where(SubCategory.main_category_id.in_(ids))
+        )
+    )
+    return count
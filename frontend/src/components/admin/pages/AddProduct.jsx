@@ -74,18 +74,21 @@ export default function AddProduct() {
     const res = await api.get(`/admin/catalog/products/by-sub-category/${subId}`);
     setProducts(res.data || []);
 
-    // fetch type images per product
+    // fetch type images for all products in batches (one request per 500)
+    const ids = (res.data || []).map((p) => p.id);
     const imgsMap = {};
-    await Promise.all(
-      (res.data || []).map(async (p) => {
-        try {
-          const r = await api.get(`/admin/catalog/product/${p.id}/type-images`);
-          imgsMap[p.id] = r.data || {};
-        } catch {
-          imgsMap[p.id] = {};
-        }
-      })
-    );
+    for (let i = 0; i < ids.length; i += 500) {
+      try {
+        const r = await api.get("/admin/catalog/products/type-images", {
+          params: { ids: ids.slice(i, i + 500) },
+          paramsSerializer: { indexes: null }, // ids=1&ids=2
+        });
+        Object.assign(imgsMap, r.data || {});
+      } catch (err) {
+        console.error(err);
+      }
+    }
+    ids.forEach((id) => (imgsMap[id] = imgsMap[id] || {}));
 
     setProductTypeImages(imgsMap);
 
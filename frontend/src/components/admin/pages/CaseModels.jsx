@@ -35,14 +35,23 @@ export default function CaseModels() {
   const [editValue, setEditValue] = useState("");
 
   /* ================= FETCH ================= */
+  // ✅ one tree request returns phones with their models nested,
+  // so picking a phone needs no extra call
   const fetchPhones = async () => {
-    const res = await api.get(`/admin/cases/phones/by-main/${mainId}`);
-    setPhones(res.data || []);
+    const res = await api.get("/admin/cases/tree");
+    const main = (res.data || []).find((m) => String(m.id) === String(mainId));
+    const list = main?.phones || [];
+    setPhones(list);
+    return list;
+  };
+
+  const showModels = (phoneId, list = phones) => {
+    const phone = list.find((p) => p.id === phoneId);
+    setModels(phone?.models || []);
   };
 
   const fetchModels = async (phoneId) => {
-    const res = await api.get(`/admin/cases/models/by-phone/${phoneId}`);
-    setModels(res.data || []);
+    showModels(phoneId, await fetchPhones());
   };
 
   useEffect(() => {
@@ -245,7 +254,7 @@ export default function CaseModels() {
               <button
                 onClick={() => {
                   setActivePhone(p);
-                  fetchModels(p.id);
+                  showModels(p.id);
                 }}
                 className="w-full text-left"
               >
@@ -20,36 +20,28 @@ export default function CaseVisibilityControl() {
 
   /* ================= FETCH ================= */
   useEffect(() => {
+    // ✅ whole hierarchy (inactive nodes included) in one request;
+    // phones/models below are read from it instead of per-click calls
     api
-      .get("/admin/cases/main-categories")
+      .get("/admin/cases/tree")
       .then((res) => setCaseCategories(res.data))
       .catch((err) => console.error(err));
   }, []);
 
-  const fetchPhones = async (caseCategoryId) => {
-    try {
-      const res = await api.get(
-        `/admin/cases/phones/by-main/${caseCategoryId}`
-      );
-      setPhones(res.data);
-      setModels([]);
-      setVariants([]);
-      setSelectedPhone("");
-      setSelectedModel("");
-    } catch (err) {
-      console.error(err);
-    }
+  const fetchPhones = (caseCategoryId) => {
+    const cat = caseCategories.find((c) => c.id === caseCategoryId);
+    setPhones(cat?.phones || []);
+    setModels([]);
+    setVariants([]);
+    setSelectedPhone("");
+    setSelectedModel("");
   };
 
-  const fetchModels = async (phoneId) => {
-    try {
-      const res = await api.get(`/admin/cases/models/by-phone/${phoneId}`);
-      setModels(res.data);
-      setVariants([]);
-      setSelectedModel("");
-    } catch (err) {
-      console.error(err);
-    }
+  const fetchModels = (phoneId) => {
+    const phone = phones.find((p) => p.id === phoneId);
+    setModels(phone?.models || []);
+    setVariants([]);
+    setSelectedModel("");
   };
 
   const fetchVariants = async (modelId) => {
@@ -88,6 +80,37 @@ export default function CaseVisibilityControl() {
     await api.put(`/admin/cases/variant/${id}/toggle`, fd);
   };
 
+  /* ================= BULK ================= */
+  // ✅ one request (one UPDATE) for every row in the list
+  const bulkToggle = async (entity, rows, setRows, value) => {
+    if (rows.length === 0) return;
+    await api.put(`/admin/cases/bulk-toggle/${entity}`, {
+      ids: rows.map((r) => r.id),
+      state: value,
+    });
+    rows.forEach((r) => (r.is_active = value));
+    setRows([...rows]);
+  };
+
+  const bulkButtons = (onClick) => (
+    <div className="ml-auto flex items-center gap-2">
+      <button
+        type="button"
+        onClick={() => onClick(true)}
+        className="px-4 py-2 rounded-xl border border-gray-200 font-extrabold text-sm text-green-700 hover:bg-green-50 transition"
+      >
+        Enable all
+      </button>
+      <button
+        type="button"
+        onClick={() => onClick(false)}
+        className="px-4 py-2 rounded-xl border border-gray-200 font-extrabold text-sm text-red-700 hover:bg-red-50 transition"
+      >
+        Disable all
+      </button>
+    </div>
+  );
+
   const switchUI = (checked) =>
     checked ? (
       <span className="inline-flex items-center gap-2 text-green-700 font-extrabold text-sm">
@@ -151,6 +174,8 @@ export default function CaseVisibilityControl() {
           <h2 className="text-xl font-black text-[#0b0f19]">
             Phones (Click case category to load)
           </h2>
+          {phones.length > 0 &&
+            bulkButtons((value) => bulkToggle("phones", phones, setPhones, value))}
         </div>
 
         {phones.length === 0 ? (
@@ -200,6 +225,8 @@ export default function CaseVisibilityControl() {
           <h2 className="text-xl font-black text-[#0b0f19]">
             Models (Click phone to load)
           </h2>
+          {models.length > 0 &&
+            bulkButtons((value) => bulkToggle("models", models, setModels, value))}
         </div>
 
         {models.length === 0 ? (
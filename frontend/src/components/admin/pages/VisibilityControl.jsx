@@ -23,6 +23,28 @@ function Toggle({ checked, onChange }) {
   );
 }
 
+/* ================= BULK BUTTONS ================= */
+function BulkButtons({ onClick, onLabel, offLabel }) {
+  return (
+    <div className="mt-3 flex items-center gap-2">
+      <button
+        type="button"
+        onClick={() => onClick(true)}
+        className="px-4 py-2 rounded-xl border border-gray-200 font-extrabold text-sm text-green-700 hover:bg-green-50 transition"
+      >
+        {onLabel}
+      </button>
+      <button
+        type="button"
+        onClick={() => onClick(false)}
+        className="px-4 py-2 rounded-xl border border-gray-200 font-extrabold text-sm text-red-700 hover:bg-red-50 transition"
+      >
+        {offLabel}
+      </button>
+    </div>
+  );
+}
+
 export default function VisibilityControl() {
   const [mainCategories, setMainCategories] = useState([]);
   const [subCategories, setSubCategories] = useState([]);
@@ -113,6 +135,22 @@ export default function VisibilityControl() {
     );
   };
 
+  /* ================= BULK ================= */
+  // ✅ one request (one UPDATE) for the whole list; products follow the
+  // search filter so "Sold Out" can target just the matches
+  const bulkToggle = async (entity, rows, setRows, field, value) => {
+    if (rows.length === 0) return;
+    const ids = new Set(rows.map((r) => r.id));
+    await api.put(`/admin/catalog/bulk-toggle/${entity}`, {
+      ids: [...ids],
+      state: value,
+    });
+
+    setRows((prev) =>
+      prev.map((r) => (ids.has(r.id) ? { ...r, [field]: value } : r))
+    );
+  };
+
   /* ================= FILTERED PRODUCTS ================= */
   const filteredProducts = useMemo(() => {
     if (!productSearch.trim()) return products;
@@ -202,6 +240,15 @@ export default function VisibilityControl() {
             <p className="text-sm text-gray-600 font-semibold mt-1">
               Choose a main category to control sub category visibility.
             </p>
+            {subCategories.length > 0 && (
+              <BulkButtons
+                onLabel="Show all"
+                offLabel="Hide all"
+                onClick={(value) =>
+                  bulkToggle("sub-categories", subCategories, setSubCategories, "is_active", value)
+                }
+              />
+            )}
           </div>
 
           <div className="w-full sm:w-[360px]">
@@ -278,6 +325,15 @@ export default function VisibilityControl() {
               <p className="text-sm text-gray-600 font-semibold mt-1">
                 Choose a sub category to control product availability.
               </p>
+              {filteredProducts.length > 0 && (
+                <BulkButtons
+                  onLabel="All available"
+                  offLabel="All sold out"
+                  onClick={(value) =>
+                    bulkToggle("products", filteredProducts, setProducts, "is_available", value)
+                  }
+                />
+              )}
             </div>
           </div>
 
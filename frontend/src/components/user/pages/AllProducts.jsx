@@ -5,6 +5,7 @@ import { useAuth } from "../../../context/AuthContext";
 import { Search, Sparkles, BadgePercent, ArrowRight, X } from "lucide-react";
 
 const TYPES = ["type1", "type2", "type3", "type4", "type5"];
+const SEARCH_LIMIT = 50;
 
 /* ================= SIMPLE SCROLL REVEAL ================= */
 function useRevealOnScroll() {
@@ -48,8 +49,9 @@ const getDiscountedPrice = (price, discount) => {
 
 export default function AllProducts() {
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [q, setQ] = useState("");
-  const [sort, setSort] = useState("default");
+  const [sort, setSort] = useState("newest");
   const [onlyOffers, setOnlyOffers] = useState(false);
 
   /* ✅ TYPE MODAL STATES */
@@ -62,35 +64,59 @@ export default function AllProducts() {
 
   useRevealOnScroll();
 
-  useEffect(() => {
-    api.get("/catalog/products").then((res) => setProducts(res.data));
-  }, []);
+  /* ================= SERVER PAGING (sort + offers filter) ================= */
+  const loadProducts = async (cursor = null) => {
+    const res = await api.get("/catalog/products", {
+      params: {
+        sort,
+        discounted: onlyOffers || undefined,
+        cursor: cursor || undefined,
+      },
+    });
 
-  /* ================= FILTER + SORT ================= */
-  const filtered = useMemo(() => {
-    let data = [...products];
-
-    if (q.trim()) {
-      data = data.filter((p) =>
-        `${p.name || ""} ${p.subtitle || ""}`
-          .toLowerCase()
-          .includes(q.toLowerCase())
-      );
-    }
+    setProducts((prev) =>
+      cursor ? [...prev, ...res.data.items] : res.data.items
+    );
+    setNextCursor(res.data.next_cursor);
+  };
 
-    if (onlyOffers) {
-      data = data.filter((p) => Number(p.discount_percent || 0) > 0);
-    }
+  useEffect(() => {
+    loadProducts().catch((err) => console.error(err));
+  }, [sort, onlyOffers]);
+
+  /* ================= SEARCH (server index, whole catalog) ================= */
+  const [results, setResults] = useState(null); // null = not searching
+  const [searchPage, setSearchPage] = useState(1);
+  const [searchMore, setSearchMore] = useState(false);
+
+  const searchProducts = async (page = 1) => {
+    const res = await api.get("/catalog/search", {
+      params: { q: q.trim(), page, limit: SEARCH_LIMIT },
+    });
+    // the index also holds case products; this page lists products only
+    const items = res.data.items.filter((i) => i.type === "product");
+
+    setResults((prev) => (page > 1 ? [...prev, ...items] : items));
+    setSearchPage(page);
+    setSearchMore(page * SEARCH_LIMIT < res.data.total);
+  };
 
-    if (sort === "low") data.sort((a, b) => (a.price || 0) - (b.price || 0));
-    if (sort === "high") data.sort((a, b) => (b.price || 0) - (a.price || 0));
-    if (sort === "discount")
-      data.sort(
-        (a, b) => (b.discount_percent || 0) - (a.discount_percent || 0)
-      );
+  useEffect(() => {
+    if (!q.trim()) {
+      setResults(null);
+      return;
+    }
+    const t = setTimeout(() => {
+      searchProducts().catch((err) => console.error(err));
+    }, 250);
+    return () => clearTimeout(t);
+  }, [q]);
 
-    return data;
-  }, [products, q, sort, onlyOffers]);
+  const filtered = useMemo(() => {
+    if (results === null) return products;
+    if (!onlyOffers) return results;
+    return results.filter((p) => Number(p.discount_percent || 0) > 0);
+  }, [products, results, onlyOffers]);
 
   /* ✅ Open modal + fetch product types */
   const openTypeModal = async (product) => {
@@ -100,10 +126,10 @@ export default function AllProducts() {
     setTypeModalOpen(true);
 
     try {
-      const res = await api.get(
-        `/admin/catalog/product/${product.id}/type-images`
-      );
-      setTypeImages(res.data || {});
+      const res = await api.get("/catalog/products/type-images", {
+        params: { ids: product.id },
+      });
+      setTypeImages(res.data?.[product.id] || {});
     } catch (err) {
       console.error(err);
       setTypeImages({});
@@ -227,9 +253,10 @@ export default function AllProducts() {
                 onChange={(e) => setSort(e.target.value)}
                 className="w-full bg-white/85 backdrop-blur border border-gray-200 rounded-3xl px-5 py-4 shadow-soft font-bold text-[#0b0f19] outline-none"
               >
-                <option value="default">Sort: Default</option>
-                <option value="low">Price: Low → High</option>
-                <option value="high">Price: High → Low</option>
+                <option value="newest">Sort: Newest</option>
+                <option value="price_asc">Price: Low → High</option>
+                <option value="price_desc">Price: High → Low</option>
+                <option value="name">Name: A → Z</option>
                 <option value="discount">Discount: High</option>
               </select>
             </div>
@@ -277,15 +304,27 @@ export default function AllProducts() {
                   style={{ transitionDelay: `${idx * 40}ms` }}
                 >
                   <div className="relative h-44 overflow-hidden bg-gray-100">
-                    <img
-                      src={
-                        p.image
-                          ? `http://localhost:8000/${p.image}`
-                          : "https://via.placeholder.com/400x300"
-                      }
-                      alt={p.name}
-                      className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110"
-                    />
+                    {/* ✅ grid uses the small WebP/JPEG thumbnail when one exists */}
+                    <picture className="block w-full h-full">
+                      {p.thumbnail?.webp && (
+                        <source
+                          srcSet={`http://localhost:8000/${p.thumbnail.webp}`}
+                          type="image/webp"
+                        />
+                      )}
+                      <img
+                        src={
+                          p.thumbnail?.jpeg
+                            ? `http://localhost:8000/${p.thumbnail.jpeg}`
+                            : p.image
+                            ? `http://localhost:8000/${p.image}`
+                            : "https://via.placeholder.com/400x300"
+                        }
+                        alt={p.name}
+                        loading="lazy"
+                        className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110"
+                      />
+                    </picture>
 
                     <div className="absolute inset-0 opacity-0 group-hover:opacity-100 transition">
                       <div className="absolute -left-24 top-0 w-40 h-full bg-white/20 skew-x-[-20deg] animate-shimmer" />
@@ -348,6 +387,21 @@ export default function AllProducts() {
             })}
           </div>
         )}
+
+        {(results === null ? nextCursor : searchMore) && (
+          <div className="mt-12 text-center">
+            <button
+              onClick={() =>
+                results === null
+                  ? loadProducts(nextCursor)
+                  : searchProducts(searchPage + 1)
+              }
+              className="px-8 py-4 rounded-3xl bg-[#0b0f19] text-white font-extrabold shadow-soft hover:scale-[1.02] transition"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </section>
 
       {/* ✅ TYPE MODAL */}
@@ -27,9 +27,7 @@ export default function CaseProduct() {
   const [variants, setVariants] = useState({}); // {type1:path,...}
   const [selectedType, setSelectedType] = useState("");
 
-  const [mainCats, setMainCats] = useState([]);
-  const [phones, setPhones] = useState([]);
-  const [models, setModels] = useState([]);
+  const [mainCats, setMainCats] = useState([]); // nested: main -> phones -> models
 
   const [selectedMain, setSelectedMain] = useState("");
   const [selectedPhone, setSelectedPhone] = useState("");
@@ -43,63 +41,46 @@ export default function CaseProduct() {
 
     (async () => {
       try {
-        const all = await api.get("/cases/products");
-        const found = (all.data || []).find((x) => String(x.id) === String(caseId));
-        setCaseProduct(found || null);
-
-        const v = await api.get(`/cases/product/${caseId}/variants`);
-        setVariants(v.data || {});
+        // ✅ product + active variants + allowed models in one call
+        const res = await api.get(`/cases/product/${caseId}`);
+        setCaseProduct(res.data?.product || null);
+        setVariants(res.data?.variants || {});
+        setAllowedModels(res.data?.allowed_models || []);
       } catch (err) {
         console.error(err);
+        setCaseProduct(null);
       }
     })();
   }, [caseId]);
 
-  /* ================= FETCH MAIN CATEGORIES ================= */
+  /* ================= FETCH CASE TREE ================= */
   useEffect(() => {
+    // ✅ whole main -> phone -> model hierarchy in one request
     api
-      .get("/cases/main-categories")
-      .then((res) => setMainCats(res.data))
+      .get("/cases/tree")
+      .then((res) => setMainCats(res.data || []))
       .catch((e) => console.error(e));
   }, []);
 
-  /* ================= FETCH PHONES ================= */
-  useEffect(() => {
-    if (!selectedMain) {
-      setPhones([]);
-      setSelectedPhone("");
-      return;
-    }
+  /* ================= PHONES ================= */
+  const phones = useMemo(() => {
+    const main = mainCats.find((m) => String(m.id) === String(selectedMain));
+    return main?.phones || [];
+  }, [mainCats, selectedMain]);
 
-    api
-      .get(`/cases/phones/by-main/${selectedMain}`)
-      .then((res) => setPhones(res.data))
-      .catch((e) => console.error(e));
-  }, [selectedMain]);
-
-  /* ================= FETCH MODELS ================= */
   useEffect(() => {
-    if (!selectedPhone) {
-      setModels([]);
-      setSelectedModel("");
-      return;
-    }
+    if (!selectedMain) setSelectedPhone("");
+  }, [selectedMain]);
 
-    api
-      .get(`/cases/models/by-phone/${selectedPhone}`)
-      .then((res) => setModels(res.data))
-      .catch((e) => console.error(e));
-  }, [selectedPhone]);
+  /* ================= MODELS ================= */
+  const models = useMemo(() => {
+    const phone = phones.find((p) => String(p.id) === String(selectedPhone));
+    return phone?.models || [];
+  }, [phones, selectedPhone]);
 
-  /* ================= FETCH ALLOWED MODELS FOR THIS CASE PRODUCT ================= */
   useEffect(() => {
-    if (!caseId) return;
-
-    api
-      .get(`/cases/product/${caseId}/allowed-models`)
-      .then((res) => setAllowedModels(res.data || []))
-      .catch((e) => console.error(e));
-  }, [caseId]);
+    if (!selectedPhone) setSelectedModel("");
+  }, [selectedPhone]);
 
   /* ================= FILTER MODELS BASED ON MAPPING ================= */
   const filteredModels = useMemo(() => {
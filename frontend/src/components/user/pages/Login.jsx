@@ -31,14 +31,34 @@ export default function Login() {
       try {
         const guestCart = getGuestCart();
 
-        for (const item of guestCart) {
-          await api.post("/cart/add", {
-            product_id: item.id,
-            quantity: item.qty,
+        // case items ("case_<id>_<model>_<type>") have no server cart yet:
+        // they stay in the guest cart
+        const products = guestCart.filter((item) => !item.is_case);
+        const cases = guestCart.filter((item) => item.is_case);
+
+        // ✅ whole guest cart in one request
+        if (products.length) {
+          const merged = await api.post("/cart/merge", {
+            items: products.map((item) => ({
+              product_id: item.id,
+              quantity: item.qty || 1,
+            })),
           });
+
+          // products removed or hidden since they were added
+          const dropped = merged.data.dropped || [];
+          if (dropped.length) {
+            alert(
+              `${dropped.length} item(s) from your guest cart are no longer available and were not added`
+            );
+          }
         }
 
-        clearGuestCart();
+        if (cases.length) {
+          localStorage.setItem("cart", JSON.stringify(cases));
+        } else {
+          clearGuestCart();
+        }
       } catch (cartErr) {
         console.warn("Cart merge failed:", cartErr);
       }
@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import api from "../../../api";
 import { addToGuestCart } from "../../../utils/cart";
@@ -53,6 +53,7 @@ const getDiscountedPrice = (price, discount) => {
 };
 
 const TYPES = ["type1", "type2", "type3", "type4", "type5"];
+const SEARCH_LIMIT = 50;
 
 export default function Products() {
   const { subId } = useParams();
@@ -60,8 +61,9 @@ export default function Products() {
   const { user } = useAuth();
 
   const [products, setProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [q, setQ] = useState("");
-  const [sort, setSort] = useState("default"); // default | low | high
+  const [sort, setSort] = useState("newest"); // newest | price_asc | price_desc
 
   /* ✅ modal states */
   const [openType, setOpenType] = useState(false);
@@ -71,31 +73,53 @@ export default function Products() {
 
   useRevealOnScroll();
 
+  /* ================= SERVER PAGING (sorted by the API) ================= */
+  const loadProducts = async (cursor = null) => {
+    const res = await api.get(`/catalog/products/sub/${subId}`, {
+      params: { sort, cursor: cursor || undefined },
+    });
+
+    setProducts((prev) =>
+      cursor ? [...prev, ...res.data.items] : res.data.items
+    );
+    setNextCursor(res.data.next_cursor);
+  };
+
   useEffect(() => {
     if (!subId) return;
-    api
-      .get(`/catalog/products/sub/${subId}`)
-      .then((res) => setProducts(res.data))
-      .catch((err) => console.error(err));
-  }, [subId]);
-
-  /* ================= FILTER + SORT ================= */
-  const filtered = useMemo(() => {
-    let data = [...products];
-
-    if (q.trim()) {
-      data = data.filter(
-        (p) =>
-          (p.name || "").toLowerCase().includes(q.toLowerCase()) ||
-          (p.subtitle || "").toLowerCase().includes(q.toLowerCase())
-      );
-    }
+    loadProducts().catch((err) => console.error(err));
+  }, [subId, sort]);
+
+  /* ================= SEARCH (server index, this sub category) ================= */
+  const [results, setResults] = useState(null); // null = not searching
+  const [searchPage, setSearchPage] = useState(1);
+  const [searchMore, setSearchMore] = useState(false);
+
+  const searchProducts = async (page = 1) => {
+    const res = await api.get("/catalog/search", {
+      params: { q: q.trim(), page, limit: SEARCH_LIMIT },
+    });
+    const items = res.data.items.filter(
+      (i) => i.type === "product" && i.sub_category_id === Number(subId)
+    );
 
-    if (sort === "low") data.sort((a, b) => (a.price || 0) - (b.price || 0));
-    if (sort === "high") data.sort((a, b) => (b.price || 0) - (a.price || 0));
+    setResults((prev) => (page > 1 ? [...prev, ...items] : items));
+    setSearchPage(page);
+    setSearchMore(page * SEARCH_LIMIT < res.data.total);
+  };
 
-    return data;
-  }, [products, q, sort]);
+  useEffect(() => {
+    if (!q.trim()) {
+      setResults(null);
+      return;
+    }
+    const t = setTimeout(() => {
+      searchProducts().catch((err) => console.error(err));
+    }, 250);
+    return () => clearTimeout(t);
+  }, [q, subId]);
+
+  const filtered = results === null ? products : results;
 
   /* ✅ open modal + fetch type images */
   const openTypeModal = async (product) => {
@@ -105,10 +129,10 @@ export default function Products() {
     setOpenType(true);
 
     try {
-      const res = await api.get(
-        `/admin/catalog/product/${product.id}/type-images`
-      );
-      setTypeImages(res.data || {});
+      const res = await api.get("/catalog/products/type-images", {
+        params: { ids: product.id },
+      });
+      setTypeImages(res.data?.[product.id] || {});
     } catch (err) {
       console.error(err);
       setTypeImages({});
@@ -245,9 +269,9 @@ export default function Products() {
                 onChange={(e) => setSort(e.target.value)}
                 className="w-full bg-white border border-gray-200 rounded-2xl px-5 py-3 shadow-soft font-bold text-[#0b0f19] outline-none"
               >
-                <option value="default">Sort: Default</option>
-                <option value="low">Price: Low → High</option>
-                <option value="high">Price: High → Low</option>
+                <option value="newest">Sort: Newest</option>
+                <option value="price_asc">Price: Low → High</option>
+                <option value="price_desc">Price: High → Low</option>
               </select>
             </div>
           </div>
@@ -282,15 +306,27 @@ export default function Products() {
                     onClick={() => navigate(`/product/${p.id}`)}
                     className="relative h-44 overflow-hidden cursor-pointer"
                   >
-                    <img
-                      src={
-                        p.image
-                          ? `http://localhost:8000/${p.image}`
-                          : "https://via.placeholder.com/400x300?text=No+Image"
-                      }
-                      alt={p.name}
-                      className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110"
-                    />
+                    {/* ✅ grid uses the small WebP/JPEG thumbnail when one exists */}
+                    <picture className="block w-full h-full">
+                      {p.thumbnail?.webp && (
+                        <source
+                          srcSet={`http://localhost:8000/${p.thumbnail.webp}`}
+                          type="image/webp"
+                        />
+                      )}
+                      <img
+                        src={
+                          p.thumbnail?.jpeg
+                            ? `http://localhost:8000/${p.thumbnail.jpeg}`
+                            : p.image
+                            ? `http://localhost:8000/${p.image}`
+                            : "https://via.placeholder.com/400x300?text=No+Image"
+                        }
+                        alt={p.name}
+                        loading="lazy"
+                        className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110"
+                      />
+                    </picture>
 
                     <div className="absolute inset-0 opacity-0 group-hover:opacity-100 transition">
                       <div className="absolute -left-24 top-0 w-40 h-full bg-white/20 skew-x-[-20deg] animate-shimmer" />
@@ -361,6 +397,21 @@ export default function Products() {
             })}
           </div>
         )}
+
+        {(results === null ? nextCursor : searchMore) && (
+          <div className="mt-12 text-center">
+            <button
+              onClick={() =>
+                results === null
+                  ? loadProducts(nextCursor)
+                  : searchProducts(searchPage + 1)
+              }
+              className="px-8 py-4 rounded-2xl bg-[#0b0f19] text-white font-extrabold shadow-soft hover:scale-[1.02] transition"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </section>
 
       {/* ✅ TYPE IMAGE MODAL */}
@@ -27,7 +27,9 @@ export default function Register() {
       await api.post("/auth/register", form);
       navigate("/login");
     } catch (err) {
-      setError("Registration failed. Try again.");
+      // e.g. "Email already exists", "Name already taken"
+      const detail = err.response?.data?.detail;
+      setError(typeof detail === "string" ? detail : "Registration failed. Try again.");
     }
   };
 